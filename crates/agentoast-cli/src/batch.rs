@@ -0,0 +1,157 @@
+//! `agentoast send --batch`: many notifications from one process.
+//!
+//! Each stdin line is a JSON object with the same fields as the `send` flags
+//! (`badge`, `body`, `badge_color`, `icon`, `repo`, `tmux_pane`, `bundle_id`,
+//! `focus`, `meta`). Missing fields fall back to the flags given on the
+//! command line, so a CI job can pass `--repo` / `--icon` once and stream
+//! only the per-result fields. The whole input is validated first and then
+//! inserted in a single transaction — one process, one DB open, one WAL
+//! commit, one wake-up for the app — instead of one of each per result.
+
+use std::collections::HashMap;
+use std::io::BufRead;
+
+use agentoast_shared::models::IconType;
+use serde::Deserialize;
+
+/// One NDJSON input line. `None` means "use the command-line default".
+#[derive(Debug, Default, Deserialize)]
+#[serde(deny_unknown_fields)]
+pub struct BatchLine {
+    pub badge: Option<String>,
+    pub body: Option<String>,
+    pub badge_color: Option<String>,
+    pub icon: Option<String>,
+    pub repo: Option<String>,
+    pub tmux_pane: Option<String>,
+    pub bundle_id: Option<String>,
+    pub focus: Option<bool>,
+    #[serde(default)]
+    pub meta: HashMap<String, String>,
+}
+
+/// A fully resolved notification ready for `db::insert_notifications`.
+#[derive(Debug, PartialEq)]
+pub struct BatchNotification {
+    pub badge: String,
+    pub body: String,
+    pub badge_color: String,
+    pub icon: IconType,
+    pub repo: Option<String>,
+    pub tmux_pane: String,
+    pub bundle_id: Option<String>,
+    pub focus: bool,
+    pub metadata: HashMap<String, String>,
+}
+
+/// Values from the `send` flags, applied to fields a line leaves out.
+pub struct BatchDefaults {
+    pub badge: String,
+    pub body: String,
+    pub badge_color: String,
+    pub icon: String,
+    pub repo: Option<String>,
+    pub tmux_pane: String,
+    pub bundle_id: Option<String>,
+    pub focus: bool,
+    pub metadata: HashMap<String, String>,
+}
+
+/// Parse every line of `reader`, skipping blank ones. Fails on the first
+/// malformed line with a 1-based line number, before anything is inserted.
+pub fn parse_batch(
+    reader: impl BufRead,
+    defaults: &BatchDefaults,
+) -> Result<Vec<BatchNotification>, String> {
+    let mut notifications = Vec::new();
+    for (i, line) in reader.lines().enumerate() {
+        let line_no = i + 1;
+        let line = line.map_err(|e| format!("Failed to read stdin: {}", e))?;
+        if line.trim().is_empty() {
+            continue;
+        }
+        let parsed: BatchLine =
+            serde_json::from_str(&line).map_err(|e| format!("line {}: {}", line_no, e))?;
+        notifications
+            .push(resolve(parsed, defaults).map_err(|e| format!("line {}: {}", line_no, e))?);
+    }
+    Ok(notifications)
+}
+
+fn resolve(line: BatchLine, defaults: &BatchDefaults) -> Result<BatchNotification, String> {
+    let icon = line.icon.as_deref().unwrap_or(&defaults.icon).parse()?;
+    let mut metadata = defaults.metadata.clone();
+    metadata.extend(line.meta);
+    Ok(BatchNotification {
+        badge: line.badge.unwrap_or_else(|| defaults.badge.clone()),
+        body: line.body.unwrap_or_else(|| defaults.body.clone()),
+        badge_color: line
+            .badge_color
+            .unwrap_or_else(|| defaults.badge_color.clone()),
+        icon,
+        repo: line.repo.or_else(|| defaults.repo.clone()),
+        tmux_pane: line.tmux_pane.unwrap_or_else(|| defaults.tmux_pane.clone()),
+        bundle_id: line.bundle_id.or_else(|| defaults.bundle_id.clone()),
+        focus: line.focus.unwrap_or(defaults.focus),
+        metadata,
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn defaults() -> BatchDefaults {
+        BatchDefaults {
+            badge: "CI".to_string(),
+            body: String::new(),
+            badge_color: "gray".to_string(),
+            icon: "agentoast".to_string(),
+            repo: Some("agentoast".to_string()),
+            tmux_pane: String::new(),
+            bundle_id: None,
+            focus: false,
+            metadata: HashMap::from([("run".to_string(), "42".to_string())]),
+        }
+    }
+
+    #[test]
+    fn lines_override_command_line_defaults() {
+        let input = r#"{"body":"lint ok","badge_color":"green"}
+
+{"badge":"Fail","body":"tests","meta":{"job":"unit"},"icon":"codex"}
+"#;
+        let parsed = parse_batch(input.as_bytes(), &defaults()).unwrap();
+        assert_eq!(parsed.len(), 2);
+
+        assert_eq!(parsed[0].badge, "CI");
+        assert_eq!(parsed[0].body, "lint ok");
+        assert_eq!(parsed[0].badge_color, "green");
+        assert_eq!(parsed[0].repo.as_deref(), Some("agentoast"));
+
+        assert_eq!(parsed[1].badge, "Fail");
+        assert_eq!(parsed[1].icon, IconType::Codex);
+        assert_eq!(
+            parsed[1].metadata.get("run").map(String::as_str),
+            Some("42")
+        );
+        assert_eq!(
+            parsed[1].metadata.get("job").map(String::as_str),
+            Some("unit")
+        );
+    }
+
+    #[test]
+    fn malformed_line_reports_line_number() {
+        let input = "{\"body\":\"ok\"}\nnot json\n";
+        let err = parse_batch(input.as_bytes(), &defaults()).unwrap_err();
+        assert!(err.starts_with("line 2:"), "{}", err);
+    }
+
+    #[test]
+    fn unknown_icon_and_fields_are_rejected() {
+        let err = parse_batch(r#"{"icon":"nope"}"#.as_bytes(), &defaults()).unwrap_err();
+        assert!(err.starts_with("line 1:"), "{}", err);
+        assert!(parse_batch(r#"{"colour":"red"}"#.as_bytes(), &defaults()).is_err());
+    }
+}
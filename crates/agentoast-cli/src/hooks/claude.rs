@@ -1,8 +1,10 @@
 use std::io::Read;
 
-use agentoast_shared::{config, models::IconType};
+use agentoast_shared::{config_snapshot, models::IconType};
 use serde::Deserialize;
 
+use crate::timing;
+
 use super::{
     collect_git_metadata, emit_result, insert_notification, truncate_body, HookContext, HookResult,
     NotificationPayload,
@@ -38,7 +40,10 @@ pub fn run() -> Result<(), String> {
         .as_deref()
         .unwrap_or(&data.hook_event_name);
 
-    let hook_config = config::load_config().notification.agents.claude_code;
+    let hook_config = timing::phase("load_config", config_snapshot::load)
+        .notification
+        .agents
+        .claude_code;
 
     if !hook_config.events.iter().any(|e| e == event_key) {
         return Ok(());
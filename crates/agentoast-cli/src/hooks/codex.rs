@@ -1,6 +1,8 @@
-use agentoast_shared::{config, models::IconType};
+use agentoast_shared::{config_snapshot, models::IconType};
 use serde::Deserialize;
 
+use crate::timing;
+
 use super::{
     collect_git_metadata, emit_result, insert_notification, truncate_body, HookContext, HookResult,
     NotificationPayload,
@@ -19,7 +21,10 @@ pub fn run(json_arg: &str) -> Result<(), String> {
     let data: CodexHookData =
         serde_json::from_str(json_arg).map_err(|e| format!("Failed to parse JSON: {}", e))?;
 
-    let hook_config = config::load_config().notification.agents.codex;
+    let hook_config = timing::phase("load_config", config_snapshot::load)
+        .notification
+        .agents
+        .codex;
 
     if !hook_config.events.iter().any(|e| e == &data.event_type) {
         return Ok(());
@@ -1,8 +1,10 @@
 use std::io::Read;
 
-use agentoast_shared::{config, models::IconType};
+use agentoast_shared::{config_snapshot, models::IconType};
 use serde::Deserialize;
 
+use crate::timing;
+
 use super::{
     collect_git_metadata, emit_result, insert_notification, truncate_body, HookContext, HookResult,
     NotificationPayload,
@@ -123,7 +125,10 @@ pub fn run(event_name: &str) -> Result<(), String> {
     let data: CopilotHookData =
         serde_json::from_str(&input).map_err(|e| format!("Failed to parse JSON: {}", e))?;
 
-    let hook_config = config::load_config().notification.agents.copilot_cli;
+    let hook_config = timing::phase("load_config", config_snapshot::load)
+        .notification
+        .agents
+        .copilot_cli;
 
     if !hook_config.events.iter().any(|e| e == event_name) {
         return Ok(());
@@ -6,9 +6,11 @@ pub mod opencode;
 use std::collections::HashMap;
 use std::path::Path;
 
-use agentoast_shared::{config, db, models::IconType};
+use agentoast_shared::{config, db, models::IconType, wake};
 use serde::Serialize;
 
+use crate::timing;
+
 pub struct GitInfo {
     pub repo_name: String,
     pub branch_name: String,
@@ -16,9 +18,10 @@ pub struct GitInfo {
 
 /// Resolve repo name + branch by reading `.git` metadata directly — hooks are
 /// invoked synchronously by the agents, so avoiding three `git` spawns keeps
-/// them fast.
+/// them fast. Repeat lookups for the same directory come from the persistent
+/// cache.
 pub fn get_git_info(cwd: &Path) -> GitInfo {
-    match agentoast_shared::git_info::resolve_git_info_uncached(cwd) {
+    match agentoast_shared::git_info::resolve_git_info_persistent(cwd) {
         Some(info) => GitInfo {
             repo_name: info.repo_name,
             branch_name: info.branch.unwrap_or_default(),
@@ -72,6 +75,12 @@ impl HookContext {
 
 /// Resolves git info from the given working directory and returns (repo_name, metadata)
 pub fn collect_git_metadata(cwd_opt: Option<&str>) -> (String, HashMap<String, String>) {
+    timing::phase("collect_git_metadata", || {
+        collect_git_metadata_inner(cwd_opt)
+    })
+}
+
+fn collect_git_metadata_inner(cwd_opt: Option<&str>) -> (String, HashMap<String, String>) {
     let mut metadata = HashMap::new();
     let repo_name = if let Some(cwd_str) = cwd_opt {
         let git_info = get_git_info(Path::new(cwd_str));
@@ -123,24 +132,27 @@ pub struct NotificationPayload<'a> {
     pub force_focus: bool,
 }
 
-/// Opens a DB connection and inserts a notification
+/// Opens a DB connection, inserts a notification and wakes the running app
 pub fn insert_notification(ctx: &HookContext, p: &NotificationPayload) -> Result<(), String> {
     let db_path = config::db_path();
-    let conn = db::open_reader(&db_path).map_err(|e| format!("Failed to open database: {}", e))?;
-    db::insert_notification(
-        &conn,
-        &db::NotificationInput {
-            badge: p.badge,
-            body: p.body,
-            badge_color: p.badge_color,
-            icon: p.icon,
-            metadata: p.metadata,
-            repo: p.repo_name,
-            tmux_pane: &ctx.tmux_pane,
-            terminal_bundle_id: &ctx.terminal_bundle_id,
-            force_focus: p.force_focus,
-        },
-    )
-    .map(|_| ())
+    let conn = timing::phase("db_open", || db::open(&db_path))
+        .map_err(|e| format!("Failed to open database: {}", e))?;
+    timing::phase("insert", || {
+        db::insert_notification(
+            &conn,
+            &db::NotificationInput {
+                badge: p.badge,
+                body: p.body,
+                badge_color: p.badge_color,
+                icon: p.icon,
+                metadata: p.metadata,
+                repo: p.repo_name,
+                tmux_pane: &ctx.tmux_pane,
+                terminal_bundle_id: &ctx.terminal_bundle_id,
+                force_focus: p.force_focus,
+            },
+        )
+    })
+    .map(|id| wake::send_new(&config::wake_socket_path(), id))
     .map_err(|e| format!("Failed to insert notification: {}", e))
 }
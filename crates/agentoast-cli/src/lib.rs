@@ -1,7 +1,9 @@
+mod batch;
 pub mod hooks;
+pub mod timing;
 
 use agentoast_shared::models::IconType;
-use agentoast_shared::{agent_detect, config, db, tmux};
+use agentoast_shared::{agent_detect, config, config_snapshot, db, tmux, wake};
 use clap::{Parser, Subcommand};
 
 use hooks::{get_git_info, parse_metadata};
@@ -70,6 +72,13 @@ enum Commands {
         /// Metadata key=value pairs (can be specified multiple times)
         #[arg(short = 'm', long = "meta", value_name = "KEY=VALUE")]
         meta: Vec<String>,
+
+        /// Read newline-delimited JSON notifications from stdin and insert them
+        /// in one transaction. Fields match the flags above (badge, body,
+        /// badge_color, icon, repo, tmux_pane, bundle_id, focus, meta); flags
+        /// given on the command line are defaults for fields a line omits.
+        #[arg(long)]
+        batch: bool,
     },
 
     /// Handle hook events from AI coding agents
@@ -152,6 +161,7 @@ enum HookAgent {
 /// Try to run CLI subcommands. Returns true if a CLI subcommand was handled,
 /// false if no CLI subcommand was detected (caller should launch the GUI).
 pub fn try_run_cli() -> bool {
+    timing::start();
     let args: Vec<String> = std::env::args().collect();
     if args.len() < 2 {
         return false;
@@ -175,14 +185,21 @@ pub fn try_run_cli() -> bool {
     if !known.contains(&first.as_str()) {
         return false;
     }
-    let cli = Cli::parse();
+    let cli = timing::phase("clap_parse", Cli::parse);
     run(cli);
+    // Cache misses from this run are persisted only now, after the hook has
+    // replied and the notification is in the database.
+    timing::phase(
+        "persist_git_info",
+        agentoast_shared::git_info::flush_persistent_cache,
+    );
+    timing::report();
     true
 }
 
 /// Resolve the tmux binary path from config + built-in lookup, or exit 1.
 fn resolve_tmux_or_exit() -> std::path::PathBuf {
-    let tmux_override = config::load_config().system.tmux;
+    let tmux_override = config_snapshot::load().system.tmux;
     match tmux::find_tmux(tmux_override.as_deref()) {
         Some(p) => p,
         None => {
@@ -204,6 +221,72 @@ fn detect_agent_for_pane(tmux_bin: &std::path::Path, pane: &str) -> Option<Strin
     agent_detect::detect_agent(&process_tree, pid)
 }
 
+/// `agentoast send --batch`: parse all of stdin, then insert everything in
+/// one transaction and wake the app once. Nothing is inserted if any line is
+/// invalid.
+fn send_batch(defaults: batch::BatchDefaults) {
+    let mut notifications =
+        batch::parse_batch(std::io::stdin().lock(), &defaults).unwrap_or_else(|e| {
+            eprintln!("Invalid batch input: {}", e);
+            std::process::exit(1);
+        });
+    if notifications.is_empty() {
+        println!("No notifications to send");
+        return;
+    }
+
+    // Repo/branch detection reads .git once for the whole batch.
+    let cwd = std::env::current_dir().unwrap_or_default();
+    let git_info = get_git_info(&cwd);
+    if git_info.repo_name.is_empty() && notifications.iter().any(|n| n.repo.is_none()) {
+        eprintln!("Could not detect repository name. Use --repo or a \"repo\" field.");
+        std::process::exit(1);
+    }
+    let env_bundle_id = std::env::var("__CFBundleIdentifier").unwrap_or_default();
+
+    for n in &mut notifications {
+        if !git_info.branch_name.is_empty() {
+            n.metadata
+                .entry("branch".to_string())
+                .or_insert_with(|| git_info.branch_name.clone());
+        }
+    }
+
+    let inputs: Vec<db::NotificationInput> = notifications
+        .iter()
+        .map(|n| db::NotificationInput {
+            badge: &n.badge,
+            body: &n.body,
+            badge_color: &n.badge_color,
+            icon: &n.icon,
+            metadata: &n.metadata,
+            repo: n.repo.as_deref().unwrap_or(&git_info.repo_name),
+            tmux_pane: &n.tmux_pane,
+            terminal_bundle_id: n.bundle_id.as_deref().unwrap_or(&env_bundle_id),
+            force_focus: n.focus,
+        })
+        .collect();
+
+    let db_path = config::db_path();
+    let conn = db::open(&db_path).unwrap_or_else(|e| {
+        eprintln!("Failed to open database: {}", e);
+        std::process::exit(1);
+    });
+
+    match db::insert_notifications(&conn, &inputs) {
+        Ok(ids) => {
+            if let Some(&last) = ids.last() {
+                wake::send_new(&config::wake_socket_path(), last);
+            }
+            println!("{} notification(s) saved", ids.len());
+        }
+        Err(e) => {
+            eprintln!("Failed to insert notifications: {}", e);
+            std::process::exit(1);
+        }
+    }
+}
+
 fn run(cli: Cli) {
     if cli.version {
         println!("{APP_VERSION}");
@@ -227,7 +310,23 @@ fn run(cli: Cli) {
             bundle_id,
             focus,
             meta,
+            batch,
         } => {
+            if batch {
+                send_batch(batch::BatchDefaults {
+                    badge,
+                    body,
+                    badge_color,
+                    icon,
+                    repo,
+                    tmux_pane,
+                    bundle_id,
+                    focus,
+                    metadata: parse_metadata(&meta),
+                });
+                return;
+            }
+
             let icon_type: IconType = icon.parse().unwrap_or_else(|e: String| {
                 eprintln!(
                     "{} Use 'agentoast', 'claude-code', 'codex', 'copilot-cli', or 'opencode'.",
@@ -272,7 +371,7 @@ fn run(cli: Cli) {
                 .unwrap_or_else(|| std::env::var("__CFBundleIdentifier").unwrap_or_default());
 
             let db_path = config::db_path();
-            let conn = db::open_reader(&db_path).unwrap_or_else(|e| {
+            let conn = db::open(&db_path).unwrap_or_else(|e| {
                 eprintln!("Failed to open database: {}", e);
                 std::process::exit(1);
             });
@@ -291,7 +390,10 @@ fn run(cli: Cli) {
                     force_focus: focus,
                 },
             ) {
-                Ok(id) => println!("Notification saved (id={})", id),
+                Ok(id) => {
+                    wake::send_new(&config::wake_socket_path(), id);
+                    println!("Notification saved (id={})", id);
+                }
                 Err(e) => {
                     eprintln!("Failed to insert notification: {}", e);
                     std::process::exit(1);
@@ -313,7 +415,7 @@ fn run(cli: Cli) {
                 return;
             }
             let db_path = config::db_path();
-            let conn = db::open_reader(&db_path).unwrap_or_else(|e| {
+            let conn = db::open(&db_path).unwrap_or_else(|e| {
                 eprintln!("Failed to open database: {}", e);
                 std::process::exit(1);
             });
@@ -416,7 +518,7 @@ fn run(cli: Cli) {
         }
         Commands::List { limit } => {
             let db_path = config::db_path();
-            let conn = db::open_reader(&db_path).unwrap_or_else(|e| {
+            let conn = db::open(&db_path).unwrap_or_else(|e| {
                 eprintln!("Failed to open database: {}", e);
                 std::process::exit(1);
             });
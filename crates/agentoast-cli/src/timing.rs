@@ -0,0 +1,69 @@
+//! Opt-in phase timing for the CLI's latency-critical paths.
+//!
+//! Agents run `agentoast hook *` synchronously, so hook latency is agent
+//! latency. With `AGENTOAST_TIMING` set, each `phase` is timed and `report`
+//! writes one line to stderr:
+//!
+//! ```text
+//! AGENTOAST_TIMING {"clap_parse_us":41,"load_config_us":95,...,"in_process_us":812}
+//! ```
+//!
+//! `src-tauri/tests/hook_latency.rs` parses that line to break end-to-end
+//! hook time down per phase. Unset (the normal case), `phase` is a plain
+//! call plus one cached env lookup, and stdout — which hooks reply on — is
+//! never touched.
+
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, Instant};
+
+pub const ENV_VAR: &str = "AGENTOAST_TIMING";
+
+/// Prefix of the stderr report line.
+pub const REPORT_PREFIX: &str = "AGENTOAST_TIMING ";
+
+static STARTED_AT: OnceLock<Option<Instant>> = OnceLock::new();
+static PHASES: Mutex<Vec<(&'static str, Duration)>> = Mutex::new(Vec::new());
+
+fn started_at() -> Option<Instant> {
+    *STARTED_AT.get_or_init(|| std::env::var_os(ENV_VAR).map(|_| Instant::now()))
+}
+
+/// Start the in-process clock. Call first thing in the CLI entry point;
+/// later calls are no-ops.
+pub fn start() {
+    let _ = started_at();
+}
+
+/// Run `f`, recording its duration under `name` when timing is enabled.
+pub fn phase<T>(name: &'static str, f: impl FnOnce() -> T) -> T {
+    if started_at().is_none() {
+        return f();
+    }
+    let begin = Instant::now();
+    let out = f();
+    let elapsed = begin.elapsed();
+    PHASES
+        .lock()
+        .unwrap_or_else(|e| e.into_inner())
+        .push((name, elapsed));
+    out
+}
+
+/// Write the recorded phases (microseconds) plus the total time since
+/// `start` to stderr. No-op when timing is disabled.
+pub fn report() {
+    let Some(started) = started_at() else {
+        return;
+    };
+    let mut fields = serde_json::Map::new();
+    for (name, elapsed) in PHASES.lock().unwrap_or_else(|e| e.into_inner()).iter() {
+        let key = format!("{}_us", name);
+        let prev = fields.get(&key).and_then(|v| v.as_u64()).unwrap_or(0);
+        fields.insert(key, (prev + elapsed.as_micros() as u64).into());
+    }
+    fields.insert(
+        "in_process_us".to_string(),
+        (started.elapsed().as_micros() as u64).into(),
+    );
+    eprintln!("{}{}", REPORT_PREFIX, serde_json::Value::Object(fields));
+}
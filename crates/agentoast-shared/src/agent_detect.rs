@@ -7,6 +7,10 @@
 //! updates both the GUI display and the `send-keys` guard at once.
 
 use std::collections::HashMap;
+#[cfg(any(target_os = "linux", test))]
+use std::io::Read;
+#[cfg(any(target_os = "linux", test))]
+use std::path::{Path, PathBuf};
 use std::process::Command;
 
 /// `(process basename, agent_type)` pairs. A pane is considered to be running an
@@ -49,8 +53,83 @@ impl ProcessTree {
     }
 }
 
-/// Build the full process tree from `/bin/ps -eo pid,ppid,comm`.
+/// Build the full process tree. On Linux `/proc` is scanned directly;
+/// elsewhere, or when `/proc` is unavailable, `/bin/ps` is parsed.
 pub fn build_process_tree() -> ProcessTree {
+    scan_proc_if_available().unwrap_or_else(build_process_tree_ps)
+}
+
+#[cfg(target_os = "linux")]
+fn scan_proc_if_available() -> Option<ProcessTree> {
+    scan_proc(Path::new("/proc"))
+}
+
+#[cfg(not(target_os = "linux"))]
+fn scan_proc_if_available() -> Option<ProcessTree> {
+    None
+}
+
+/// Read pid, ppid and comm from every `<root>/<pid>/stat`: one open + read
+/// per process, no spawn, with the path and read buffers reused across
+/// processes. `comm` is the same (15-byte, kernel-truncated) name that
+/// `ps -o comm` prints on Linux. Returns None if nothing could be read.
+#[cfg(any(target_os = "linux", test))]
+fn scan_proc(root: &Path) -> Option<ProcessTree> {
+    let mut children: HashMap<u32, Vec<u32>> = HashMap::new();
+    let mut commands: HashMap<u32, String> = HashMap::new();
+
+    let mut path = PathBuf::from(root);
+    let mut buf = Vec::with_capacity(512);
+    for entry in std::fs::read_dir(root).ok()?.flatten() {
+        let name = entry.file_name();
+        let Some(pid) = name.to_str().and_then(|n| n.parse::<u32>().ok()) else {
+            continue;
+        };
+
+        path.push(&name);
+        path.push("stat");
+        buf.clear();
+        // The process may exit between readdir and open; just skip it.
+        let read = std::fs::File::open(&path).and_then(|mut f| f.read_to_end(&mut buf));
+        path.pop();
+        path.pop();
+        if read.is_err() {
+            continue;
+        }
+
+        let Some((ppid, comm)) = parse_proc_stat(&buf) else {
+            continue;
+        };
+        if comm.is_empty() {
+            continue;
+        }
+        children.entry(ppid).or_default().push(pid);
+        commands.insert(pid, String::from_utf8_lossy(comm).into_owned());
+    }
+
+    if commands.is_empty() {
+        return None;
+    }
+    Some(ProcessTree { children, commands })
+}
+
+/// Parse `pid (comm) state ppid ...`. `comm` may itself contain spaces and
+/// parentheses, so it spans from the first `(` to the last `)`.
+#[cfg(any(target_os = "linux", test))]
+fn parse_proc_stat(stat: &[u8]) -> Option<(u32, &[u8])> {
+    let open = stat.iter().position(|&b| b == b'(')?;
+    let close = stat.iter().rposition(|&b| b == b')')?;
+    let comm = stat.get(open + 1..close)?;
+    let mut fields = stat[close + 1..]
+        .split(|&b| b == b' ')
+        .filter(|f| !f.is_empty());
+    let _state = fields.next()?;
+    let ppid = std::str::from_utf8(fields.next()?).ok()?.parse().ok()?;
+    Some((ppid, comm))
+}
+
+/// Build the full process tree from `/bin/ps -eo pid,ppid,comm`.
+fn build_process_tree_ps() -> ProcessTree {
     let mut children: HashMap<u32, Vec<u32>> = HashMap::new();
     let mut commands: HashMap<u32, String> = HashMap::new();
 
@@ -134,6 +213,52 @@ mod tests {
         ProcessTree { children, commands }
     }
 
+    #[test]
+    fn parses_proc_stat_with_awkward_comm() {
+        let (ppid, comm) = parse_proc_stat(b"4242 (tmux: server) S 1 4242 4242 0 -1").unwrap();
+        assert_eq!(ppid, 1);
+        assert_eq!(comm, b"tmux: server");
+
+        let (ppid, comm) = parse_proc_stat(b"77 (a) (b)) R 76 77 0\n").unwrap();
+        assert_eq!(ppid, 76);
+        assert_eq!(comm, b"a) (b)");
+
+        assert!(parse_proc_stat(b"garbage").is_none());
+    }
+
+    #[test]
+    fn scans_fake_proc_tree() {
+        let tmp = tempfile::tempdir().unwrap();
+        let stat = |pid: u32, comm: &str, ppid: u32| {
+            let dir = tmp.path().join(pid.to_string());
+            std::fs::create_dir_all(&dir).unwrap();
+            std::fs::write(
+                dir.join("stat"),
+                format!("{} ({}) S {} 0 0 0 -1", pid, comm, ppid),
+            )
+            .unwrap();
+        };
+        stat(100, "zsh", 1);
+        stat(200, "claude", 100);
+        // Non-pid entries and pids without a readable stat are skipped.
+        std::fs::create_dir_all(tmp.path().join("self")).unwrap();
+        std::fs::create_dir_all(tmp.path().join("300")).unwrap();
+
+        let tree = scan_proc(tmp.path()).unwrap();
+        assert_eq!(tree.process_count(), 2);
+        assert_eq!(tree.children_of(100), &[200]);
+        assert_eq!(detect_agent(&tree, 100).as_deref(), Some("claude-code"));
+    }
+
+    #[cfg(target_os = "linux")]
+    #[test]
+    fn real_proc_contains_own_process() {
+        let tree = build_process_tree();
+        let me = std::process::id();
+        let parent = std::os::unix::process::parent_id();
+        assert!(tree.children_of(parent).contains(&me));
+    }
+
     #[test]
     fn detects_claude_among_descendants() {
         // pane(100) -> zsh(200) -> node(300) -> claude(400)
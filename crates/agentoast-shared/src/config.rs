@@ -23,6 +23,18 @@ pub fn db_path() -> PathBuf {
     data_dir().join("notifications.db")
 }
 
+/// Datagram socket the running app listens on for CLI wake-ups
+/// (see `wake`).
+pub fn wake_socket_path() -> PathBuf {
+    data_dir().join("wake.sock")
+}
+
+/// Persistent git repo info cache shared by the CLI and the app, one file
+/// per path (see `git_info`).
+pub fn git_info_cache_dir() -> PathBuf {
+    data_dir().join("git_info")
+}
+
 /// Marker file written when onboarding has been completed.
 pub fn onboarded_marker_path() -> PathBuf {
     data_dir().join(".onboarded")
@@ -52,7 +64,7 @@ pub fn config_dir() -> PathBuf {
     }
 }
 
-#[derive(Debug, Clone, Default, Deserialize)]
+#[derive(Debug, Clone, Default, Deserialize, Serialize)]
 pub struct AppConfig {
     pub editor: Option<String>,
     #[serde(default)]
@@ -69,7 +81,7 @@ pub struct AppConfig {
     pub apps: AppsConfig,
 }
 
-#[derive(Debug, Clone, Default, Deserialize)]
+#[derive(Debug, Clone, Default, Deserialize, Serialize)]
 pub struct AppsConfig {
     #[serde(default)]
     pub allowed_apps: Vec<AllowedApp>,
@@ -128,7 +140,7 @@ impl ToastDisplay {
     }
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct ToastConfig {
     #[serde(default = "default_toast_duration")]
     pub duration_ms: u64,
@@ -155,7 +167,7 @@ fn default_toast_positions() -> Vec<ToastPosition> {
     vec![ToastPosition::TopRight]
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct NotificationConfig {
     #[serde(default)]
     pub muted: bool,
@@ -165,6 +177,8 @@ pub struct NotificationConfig {
     pub show_non_agent_panes: bool,
     #[serde(default)]
     pub agents: AgentsConfig,
+    #[serde(default)]
+    pub retention: RetentionConfig,
 }
 
 impl Default for NotificationConfig {
@@ -174,10 +188,38 @@ impl Default for NotificationConfig {
             filter_notified_only: default_filter_notified_only(),
             show_non_agent_panes: default_show_non_agent_panes(),
             agents: AgentsConfig::default(),
+            retention: RetentionConfig::default(),
+        }
+    }
+}
+
+/// Bounds on stored notification history, enforced by the app's background
+/// compaction (see `retention`). `0` disables a limit.
+#[derive(Debug, Clone, Deserialize, Serialize)]
+pub struct RetentionConfig {
+    #[serde(default = "default_retention_max_rows_per_repo")]
+    pub max_rows_per_repo: u64,
+    #[serde(default = "default_retention_max_age_days")]
+    pub max_age_days: u64,
+}
+
+impl Default for RetentionConfig {
+    fn default() -> Self {
+        Self {
+            max_rows_per_repo: default_retention_max_rows_per_repo(),
+            max_age_days: default_retention_max_age_days(),
         }
     }
 }
 
+fn default_retention_max_rows_per_repo() -> u64 {
+    500
+}
+
+fn default_retention_max_age_days() -> u64 {
+    30
+}
+
 fn default_filter_notified_only() -> bool {
     false
 }
@@ -190,7 +232,7 @@ fn default_toast_duration() -> u64 {
     4000
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct KeybindingConfig {
     #[serde(default = "default_toggle_panel")]
     pub toggle_panel: String,
@@ -208,7 +250,7 @@ fn default_toggle_panel() -> String {
     "super+ctrl+n".to_string()
 }
 
-#[derive(Debug, Clone, Default, Deserialize)]
+#[derive(Debug, Clone, Default, Deserialize, Serialize)]
 pub struct AgentsConfig {
     #[serde(default)]
     pub claude_code: ClaudeCodeHookConfig,
@@ -220,7 +262,7 @@ pub struct AgentsConfig {
     pub opencode: OpenCodeHookConfig,
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct ClaudeCodeHookConfig {
     #[serde(default = "default_claude_code_events")]
     pub events: Vec<String>,
@@ -240,7 +282,7 @@ impl Default for ClaudeCodeHookConfig {
     }
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct CodexHookConfig {
     #[serde(default = "default_codex_events")]
     pub events: Vec<String>,
@@ -264,7 +306,7 @@ fn default_codex_events() -> Vec<String> {
     vec!["agent-turn-complete".to_string()]
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct CopilotCliHookConfig {
     #[serde(default = "default_copilot_cli_events")]
     pub events: Vec<String>,
@@ -288,7 +330,7 @@ fn default_copilot_cli_events() -> Vec<String> {
     vec!["agentStop".to_string()]
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct OpenCodeHookConfig {
     #[serde(default = "default_opencode_events")]
     pub events: Vec<String>,
@@ -317,7 +359,7 @@ fn default_true() -> bool {
     true
 }
 
-#[derive(Debug, Clone, Deserialize)]
+#[derive(Debug, Clone, Deserialize, Serialize)]
 pub struct UpdateConfig {
     #[serde(default = "default_true")]
     pub enabled: bool,
@@ -329,7 +371,7 @@ impl Default for UpdateConfig {
     }
 }
 
-#[derive(Debug, Clone, Default, Deserialize)]
+#[derive(Debug, Clone, Default, Deserialize, Serialize)]
 pub struct SystemConfig {
     pub tmux: Option<String>,
     // `git` used to live here as a binary-path override. Repo/branch info is
@@ -352,11 +394,22 @@ pub fn config_path() -> PathBuf {
     config_dir().join("config.toml")
 }
 
+/// Precompiled copy of config.toml for short-lived CLI processes
+/// (see `config_snapshot`).
+pub fn config_snapshot_path() -> PathBuf {
+    data_dir().join("config.snapshot")
+}
+
+/// Parse config.toml content.
+pub fn parse_config(content: &str) -> Result<AppConfig, toml::de::Error> {
+    toml::from_str(content)
+}
+
 /// Load config.toml. Return defaults if the file is missing or fails to parse.
 pub fn load_config() -> AppConfig {
     let path = config_path();
     match std::fs::read_to_string(&path) {
-        Ok(content) => toml::from_str(&content).unwrap_or_else(|e| {
+        Ok(content) => parse_config(&content).unwrap_or_else(|e| {
             log::warn!("Failed to parse config.toml: {}, using defaults", e);
             AppConfig::default()
         }),
@@ -524,6 +577,14 @@ fn default_config_template() -> &'static str {
 # Show tmux panes without an AI coding agent (default: false)
 # show_non_agent_panes = false
 
+# Notification history limits, enforced periodically in the background
+[notification.retention]
+# Keep at most this many notifications per repository (default: 500, 0 = unlimited)
+# max_rows_per_repo = 500
+
+# Delete notifications older than this many days (default: 30, 0 = unlimited)
+# max_age_days = 30
+
 # Claude Code agent settings
 [notification.agents.claude_code]
 # Events that trigger notifications
@@ -832,6 +893,24 @@ allowed_apps = [
         );
     }
 
+    #[test]
+    fn default_retention_config() {
+        let config = RetentionConfig::default();
+        assert_eq!(config.max_rows_per_repo, 500);
+        assert_eq!(config.max_age_days, 30);
+    }
+
+    #[test]
+    fn parse_retention_config() {
+        let toml_str = r#"
+[notification.retention]
+max_rows_per_repo = 0
+"#;
+        let config: AppConfig = toml::from_str(toml_str).unwrap();
+        assert_eq!(config.notification.retention.max_rows_per_repo, 0);
+        assert_eq!(config.notification.retention.max_age_days, 30);
+    }
+
     #[test]
     fn parse_empty_agents_section() {
         let toml_str = r#"
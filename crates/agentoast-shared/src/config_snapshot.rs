@@ -0,0 +1,194 @@
+//! Precompiled config for short-lived CLI processes.
+//!
+//! The app parses config.toml once and keeps it (`terminal::get_config`),
+//! but every `agentoast hook *` is a fresh process that would otherwise
+//! read and TOML-parse the whole file on each agent event. `load` keeps a
+//! parsed copy in `config::config_snapshot_path()`, keyed by the config
+//! file's path, mtime and size plus the crate version (the payload layout
+//! follows the structs). While the key matches, a hook pays one `stat` and
+//! one small read + JSON decode; any edit to config.toml — by hand or via
+//! the app's `save_*` helpers — changes the key and the next call reparses
+//! and rewrites the snapshot.
+//!
+//! File layout: `key || JSON(AppConfig)`, where `key` is
+//! `MAGIC version \0 path \0 mtime_ns(u128 LE) size(u64 LE)`.
+
+use std::fs::Metadata;
+use std::path::Path;
+use std::time::UNIX_EPOCH;
+
+use crate::config::{self, AppConfig};
+
+const MAGIC: &[u8] = b"AGTCFG1\0";
+
+/// Same result as `config::load_config`, served from the snapshot when
+/// config.toml has not changed since it was written.
+pub fn load() -> AppConfig {
+    load_from(&config::config_path(), &config::config_snapshot_path())
+}
+
+fn load_from(config_path: &Path, snapshot_path: &Path) -> AppConfig {
+    // Stat before reading: if the file changes in between, the snapshot is
+    // stored under the old key and simply misses next time.
+    let Ok(meta) = std::fs::metadata(config_path) else {
+        return AppConfig::default();
+    };
+    let key = snapshot_key(config_path, &meta);
+    if let Some(cached) = read_snapshot(snapshot_path, &key) {
+        return cached;
+    }
+
+    let Ok(content) = std::fs::read_to_string(config_path) else {
+        return AppConfig::default();
+    };
+    match config::parse_config(&content) {
+        Ok(parsed) => {
+            write_snapshot(snapshot_path, &key, &parsed);
+            parsed
+        }
+        // Not cached, so the warning repeats until the file is fixed.
+        Err(e) => {
+            log::warn!("Failed to parse config.toml: {}, using defaults", e);
+            AppConfig::default()
+        }
+    }
+}
+
+fn snapshot_key(config_path: &Path, meta: &Metadata) -> Vec<u8> {
+    let mtime_ns = meta
+        .modified()
+        .ok()
+        .and_then(|t| t.duration_since(UNIX_EPOCH).ok())
+        .map_or(0, |d| d.as_nanos());
+    let path = config_path.to_string_lossy();
+
+    let mut key = Vec::with_capacity(MAGIC.len() + path.len() + 40);
+    key.extend_from_slice(MAGIC);
+    key.extend_from_slice(env!("CARGO_PKG_VERSION").as_bytes());
+    key.push(0);
+    key.extend_from_slice(path.as_bytes());
+    key.push(0);
+    key.extend_from_slice(&mtime_ns.to_le_bytes());
+    key.extend_from_slice(&meta.len().to_le_bytes());
+    key
+}
+
+fn read_snapshot(snapshot_path: &Path, key: &[u8]) -> Option<AppConfig> {
+    let bytes = std::fs::read(snapshot_path).ok()?;
+    let payload = bytes.strip_prefix(key)?;
+    serde_json::from_slice(payload).ok()
+}
+
+/// Best effort: write to a per-process temp file and rename over the
+/// snapshot, so concurrent hooks never see a torn file.
+fn write_snapshot(snapshot_path: &Path, key: &[u8], parsed: &AppConfig) {
+    let Ok(payload) = serde_json::to_vec(parsed) else {
+        return;
+    };
+    let mut bytes = Vec::with_capacity(key.len() + payload.len());
+    bytes.extend_from_slice(key);
+    bytes.extend_from_slice(&payload);
+
+    if let Some(parent) = snapshot_path.parent() {
+        std::fs::create_dir_all(parent).ok();
+    }
+    let tmp = snapshot_path.with_extension(format!("snapshot.{}.tmp", std::process::id()));
+    let result = std::fs::write(&tmp, &bytes).and_then(|()| std::fs::rename(&tmp, snapshot_path));
+    if let Err(e) = result {
+        log::debug!("config snapshot: write failed: {}", e);
+        std::fs::remove_file(&tmp).ok();
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    struct Paths {
+        _tmp: tempfile::TempDir,
+        config: std::path::PathBuf,
+        snapshot: std::path::PathBuf,
+    }
+
+    fn paths() -> Paths {
+        let tmp = tempfile::tempdir().unwrap();
+        Paths {
+            config: tmp.path().join("config.toml"),
+            snapshot: tmp.path().join("data").join("config.snapshot"),
+            _tmp: tmp,
+        }
+    }
+
+    #[test]
+    fn snapshot_is_served_while_config_is_unchanged() {
+        let p = paths();
+        std::fs::write(&p.config, "[system]\ntmux = \"/opt/tmux\"\n").unwrap();
+
+        let first = load_from(&p.config, &p.snapshot);
+        assert_eq!(first.system.tmux.as_deref(), Some("/opt/tmux"));
+        assert!(p.snapshot.exists());
+
+        // Plant a different payload under the current key: `load_from` must
+        // return it without reparsing the TOML.
+        let key = snapshot_key(&p.config, &std::fs::metadata(&p.config).unwrap());
+        let mut planted = first.clone();
+        planted.system.tmux = Some("/from/snapshot".to_string());
+        write_snapshot(&p.snapshot, &key, &planted);
+
+        let second = load_from(&p.config, &p.snapshot);
+        assert_eq!(second.system.tmux.as_deref(), Some("/from/snapshot"));
+    }
+
+    #[test]
+    fn editing_config_invalidates_snapshot() {
+        let p = paths();
+        std::fs::write(&p.config, "[notification]\nmuted = false\n").unwrap();
+        assert!(!load_from(&p.config, &p.snapshot).notification.muted);
+
+        std::fs::write(&p.config, "[notification]\nmuted = true\n\n").unwrap();
+        assert!(load_from(&p.config, &p.snapshot).notification.muted);
+    }
+
+    #[test]
+    fn round_trip_preserves_hook_config() {
+        let p = paths();
+        std::fs::write(
+            &p.config,
+            r#"
+[notification.agents.claude_code]
+events = ["Stop"]
+focus_events = ["Stop"]
+include_body = false
+
+[[apps.allowed_apps]]
+bundle_id = "com.example.app"
+display_name = "Example"
+"#,
+        )
+        .unwrap();
+        load_from(&p.config, &p.snapshot);
+
+        let key = snapshot_key(&p.config, &std::fs::metadata(&p.config).unwrap());
+        let cached = read_snapshot(&p.snapshot, &key).expect("snapshot written");
+        let claude = cached.notification.agents.claude_code;
+        assert_eq!(claude.events, vec!["Stop"]);
+        assert_eq!(claude.focus_events, vec!["Stop"]);
+        assert!(!claude.include_body);
+        assert_eq!(cached.apps.allowed_apps[0].bundle_id, "com.example.app");
+        assert_eq!(
+            cached.notification.agents.codex.events,
+            vec!["agent-turn-complete"]
+        );
+    }
+
+    #[test]
+    fn invalid_or_missing_config_is_not_cached() {
+        let p = paths();
+        assert!(!load_from(&p.config, &p.snapshot).notification.muted);
+        assert!(!p.snapshot.exists());
+
+        std::fs::write(&p.config, "[notification\nmuted = true").unwrap();
+        assert!(!load_from(&p.config, &p.snapshot).notification.muted);
+        assert!(!p.snapshot.exists());
+    }
+}
@@ -1,12 +1,18 @@
 pub use rusqlite::Connection;
 
 use rusqlite::params;
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
 use std::path::Path;
 
 use crate::models::{IconType, Notification};
 use crate::schema;
 
+/// Capacity of each connection's prepared-statement cache. Every fixed query
+/// below goes through `prepare_cached`, so long-lived connections (watcher,
+/// polling, session poller) parse each SQL string once instead of per call.
+/// Sized to hold all of them with headroom.
+const STATEMENT_CACHE_CAPACITY: usize = 32;
+
 pub fn open(db_path: &Path) -> rusqlite::Result<Connection> {
     if let Some(parent) = db_path.parent() {
         std::fs::create_dir_all(parent).ok();
@@ -15,6 +21,7 @@ pub fn open(db_path: &Path) -> rusqlite::Result<Connection> {
     let conn = Connection::open(db_path)?;
     conn.pragma_update(None, "journal_mode", "WAL")?;
     conn.pragma_update(None, "busy_timeout", 5000)?;
+    conn.set_prepared_statement_cache_capacity(STATEMENT_CACHE_CAPACITY);
     schema::initialize(&conn)?;
     Ok(conn)
 }
@@ -26,9 +33,18 @@ pub fn open_reader(db_path: &Path) -> rusqlite::Result<Connection> {
     let conn = Connection::open(db_path)?;
     conn.pragma_update(None, "journal_mode", "WAL")?;
     conn.pragma_update(None, "busy_timeout", 5000)?;
+    conn.set_prepared_statement_cache_capacity(STATEMENT_CACHE_CAPACITY);
     Ok(conn)
 }
 
+/// `PRAGMA data_version` for this connection. The value changes whenever
+/// another connection commits to the database (commits made through `conn`
+/// itself do not move it), so long-lived readers can compare it against the
+/// last value they saw and skip their queries when nothing changed.
+pub fn data_version(conn: &Connection) -> rusqlite::Result<i64> {
+    conn.pragma_query_value(None, "data_version", |row| row.get(0))
+}
+
 pub struct NotificationInput<'a> {
     pub badge: &'a str,
     pub body: &'a str,
@@ -41,47 +57,107 @@ pub struct NotificationInput<'a> {
     pub force_focus: bool,
 }
 
+/// Metadata keys stored in their own columns (schema migrations 4 and 7), in
+/// column order: NULL when the key is absent, its value (even '') otherwise.
+/// Anything else stays in the `metadata` JSON column.
+const METADATA_COLUMNS: [&str; 4] = ["branch", "teammate", "team", "task"];
+
+const EMPTY_METADATA_JSON: &str = "{}";
+
 pub fn insert_notification(conn: &Connection, input: &NotificationInput) -> rusqlite::Result<i64> {
-    let metadata_json = serde_json::to_string(input.metadata).unwrap_or_else(|_| "{}".to_string());
-    let badge = input.badge;
-    let body = input.body;
-    let badge_color = input.badge_color;
-    let icon = input.icon;
-    let tmux_pane = input.tmux_pane;
-    let terminal_bundle_id = input.terminal_bundle_id;
-    let repo = input.repo;
-    let force_focus = input.force_focus;
+    insert_notifications(conn, std::slice::from_ref(input)).map(|ids| ids[0])
+}
 
+/// Insert `inputs` in order inside one transaction, reusing the same prepared
+/// statements for every row, and return their ids. Used by
+/// `agentoast send --batch` so a burst of notifications costs one WAL commit.
+pub fn insert_notifications(
+    conn: &Connection,
+    inputs: &[NotificationInput],
+) -> rusqlite::Result<Vec<i64>> {
     // Wrap DELETE+INSERT in a transaction so they produce a single WAL write,
     // preventing the file-watcher debounce from missing the INSERT.
     let tx = conn.unchecked_transaction()?;
+    let mut delete_by_pane = tx.prepare_cached("DELETE FROM notifications WHERE tmux_pane = ?1")?;
+    let mut insert = tx.prepare_cached(
+        "INSERT INTO notifications (badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, branch, teammate, team, task)
+         VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, ?12, ?13)",
+    )?;
 
-    // Overwrite: remove existing notifications from the same tmux pane
-    if !tmux_pane.is_empty() {
-        tx.execute(
-            "DELETE FROM notifications WHERE tmux_pane = ?1",
-            params![tmux_pane],
-        )?;
-    }
+    let mut ids = Vec::with_capacity(inputs.len());
+    for input in inputs {
+        let [branch, teammate, team, task] =
+            METADATA_COLUMNS.map(|key| input.metadata.get(key).map(String::as_str));
+        let metadata_json = extra_metadata_json(input.metadata);
+        let badge = input.badge;
+        let body = input.body;
+        let badge_color = input.badge_color;
+        let icon = input.icon;
+        let tmux_pane = input.tmux_pane;
+        let terminal_bundle_id = input.terminal_bundle_id;
+        let repo = input.repo;
+        let force_focus = input.force_focus;
 
-    tx.execute(
-        "INSERT INTO notifications (badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus)
-         VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9)",
-        params![badge, body, badge_color, icon.as_str(), metadata_json, repo, tmux_pane, terminal_bundle_id, force_focus as i32],
-    )?;
+        // Overwrite: remove existing notifications from the same tmux pane
+        if !tmux_pane.is_empty() {
+            delete_by_pane.execute(params![tmux_pane])?;
+        }
+
+        insert.execute(params![
+            badge,
+            body,
+            badge_color,
+            icon.as_str(),
+            metadata_json,
+            repo,
+            tmux_pane,
+            terminal_bundle_id,
+            force_focus as i32,
+            branch,
+            teammate,
+            team,
+            task
+        ])?;
+        ids.push(tx.last_insert_rowid());
+    }
 
-    let id = conn.last_insert_rowid();
+    drop(delete_by_pane);
+    drop(insert);
     tx.commit()?;
-    Ok(id)
+    Ok(ids)
+}
+
+/// JSON for the metadata pairs that have no column of their own. Only
+/// arbitrary `--meta` pairs need it; hooks usually have none.
+fn extra_metadata_json(metadata: &HashMap<String, String>) -> String {
+    let extra: HashMap<&String, &String> = metadata
+        .iter()
+        .filter(|(k, _)| !METADATA_COLUMNS.contains(&k.as_str()))
+        .collect();
+    if extra.is_empty() {
+        EMPTY_METADATA_JSON.to_string()
+    } else {
+        serde_json::to_string(&extra).unwrap_or_else(|_| EMPTY_METADATA_JSON.to_string())
+    }
 }
 
+/// Expects the column order of the SELECTs below: the base columns, then
+/// `METADATA_COLUMNS` at indices 12..=15.
 fn row_to_notification(row: &rusqlite::Row) -> rusqlite::Result<Notification> {
     let metadata_str: String = row.get(5)?;
-    let metadata: HashMap<String, String> =
+    let mut metadata: HashMap<String, String> = if metadata_str == EMPTY_METADATA_JSON {
+        HashMap::new()
+    } else {
         serde_json::from_str(&metadata_str).unwrap_or_else(|e| {
             log::warn!("Failed to parse notification metadata: {e}");
             HashMap::new()
-        });
+        })
+    };
+    for (i, key) in METADATA_COLUMNS.iter().enumerate() {
+        if let Some(value) = row.get::<_, Option<String>>(12 + i)? {
+            metadata.insert(key.to_string(), value);
+        }
+    }
 
     Ok(Notification {
         id: row.get(0)?,
@@ -100,32 +176,92 @@ fn row_to_notification(row: &rusqlite::Row) -> rusqlite::Result<Notification> {
 }
 
 pub fn get_notifications(conn: &Connection, limit: i64) -> rusqlite::Result<Vec<Notification>> {
-    let mut stmt = conn.prepare(
-        "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at
-         FROM notifications ORDER BY created_at DESC LIMIT ?1",
+    get_notifications_page(conn, None, limit)
+}
+
+/// One page of notifications, newest first, ordered by `(created_at, id)`.
+///
+/// `before` is the `(created_at, id)` of the last row of the previous page;
+/// `None` starts from the newest row. Keyset pagination keeps every page an
+/// index range scan over `idx_notifications_created_at_id`, read backwards,
+/// unlike OFFSET which re-reads every skipped row.
+pub fn get_notifications_page(
+    conn: &Connection,
+    before: Option<(&str, i64)>,
+    limit: i64,
+) -> rusqlite::Result<Vec<Notification>> {
+    match before {
+        None => {
+            let mut stmt = conn.prepare_cached(
+                "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at, branch, teammate, team, task
+                 FROM notifications ORDER BY created_at DESC, id DESC LIMIT ?1",
+            )?;
+            let rows = stmt.query_map(params![limit], row_to_notification)?;
+            rows.collect()
+        }
+        Some((created_at, id)) => {
+            let mut stmt = conn.prepare_cached(
+                "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at, branch, teammate, team, task
+                 FROM notifications WHERE (created_at, id) < (?1, ?2)
+                 ORDER BY created_at DESC, id DESC LIMIT ?3",
+            )?;
+            let rows = stmt.query_map(params![created_at, id, limit], row_to_notification)?;
+            rows.collect()
+        }
+    }
+}
+
+/// Full-text search over body, badge, repo and metadata branch, best match
+/// first. Every whitespace-separated word of `query` must match as a prefix;
+/// FTS5 operators in user input are treated as literal text.
+pub fn search_notifications(
+    conn: &Connection,
+    query: &str,
+    limit: i64,
+) -> rusqlite::Result<Vec<Notification>> {
+    let Some(fts_query) = to_fts_query(query) else {
+        return Ok(Vec::new());
+    };
+    let mut stmt = conn.prepare_cached(
+        "SELECT n.id, n.badge, n.body, n.badge_color, n.icon, n.metadata, n.repo, n.tmux_pane, n.terminal_bundle_id, n.force_focus, n.is_read, n.created_at, n.branch, n.teammate, n.team, n.task
+         FROM notifications_fts f JOIN notifications n ON n.id = f.rowid
+         WHERE notifications_fts MATCH ?1
+         ORDER BY f.rank, n.id DESC LIMIT ?2",
     )?;
-    let rows = stmt.query_map(params![limit], row_to_notification)?;
+    let rows = stmt.query_map(params![fts_query, limit], row_to_notification)?;
     rows.collect()
 }
 
+/// Turn free-form input into an FTS5 query of quoted prefix terms, e.g.
+/// `fix "ci` -> `"fix"* """ci"*`. `None` when there is nothing to search.
+fn to_fts_query(query: &str) -> Option<String> {
+    let terms: Vec<String> = query
+        .split_whitespace()
+        .map(|word| format!("\"{}\"*", word.replace('"', "\"\"")))
+        .collect();
+    if terms.is_empty() {
+        None
+    } else {
+        Some(terms.join(" "))
+    }
+}
+
+/// O(1): reads the counter row the schema's triggers keep in sync with
+/// `notifications.is_read`.
 pub fn get_unread_count(conn: &Connection) -> rusqlite::Result<i64> {
-    conn.query_row(
-        "SELECT COUNT(*) FROM notifications WHERE is_read = 0",
-        [],
-        |row| row.get(0),
-    )
+    conn.prepare_cached("SELECT unread FROM notification_counts WHERE id = 1")?
+        .query_row([], |row| row.get(0))
 }
 
 pub fn delete_notification(conn: &Connection, id: i64) -> rusqlite::Result<()> {
-    conn.execute("DELETE FROM notifications WHERE id = ?1", params![id])?;
+    conn.prepare_cached("DELETE FROM notifications WHERE id = ?1")?
+        .execute(params![id])?;
     Ok(())
 }
 
 pub fn delete_notifications_by_pane(conn: &Connection, tmux_pane: &str) -> rusqlite::Result<usize> {
-    conn.execute(
-        "DELETE FROM notifications WHERE tmux_pane = ?1",
-        params![tmux_pane],
-    )
+    conn.prepare_cached("DELETE FROM notifications WHERE tmux_pane = ?1")?
+        .execute(params![tmux_pane])
 }
 
 pub fn delete_notifications_by_panes(
@@ -136,6 +272,8 @@ pub fn delete_notifications_by_panes(
         return Ok(0);
     }
 
+    // Arity varies per call, so this one is prepared ad hoc rather than
+    // cached (each pane count would otherwise occupy its own cache slot).
     let placeholders: Vec<String> = (1..=panes.len()).map(|i| format!("?{}", i)).collect();
     let sql = format!(
         "DELETE FROM notifications WHERE tmux_pane IN ({})",
@@ -151,16 +289,75 @@ pub fn delete_notifications_by_panes(
 }
 
 pub fn delete_all_notifications(conn: &Connection) -> rusqlite::Result<()> {
-    conn.execute("DELETE FROM notifications", [])?;
+    conn.prepare_cached("DELETE FROM notifications")?
+        .execute([])?;
     Ok(())
 }
 
+/// Delete up to `limit` notifications older than `max_age_days`. Returns the
+/// number removed; callers loop until it falls below `limit` so each write
+/// transaction stays short.
+pub fn delete_expired_batch(
+    conn: &Connection,
+    max_age_days: u64,
+    limit: usize,
+) -> rusqlite::Result<usize> {
+    conn.prepare_cached(
+        "DELETE FROM notifications WHERE id IN (
+             SELECT id FROM notifications
+             WHERE created_at < strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-' || ?1 || ' days')
+             LIMIT ?2
+         )",
+    )?
+    .execute(params![max_age_days as i64, limit as i64])
+}
+
+/// For each repo with at least `max_rows` notifications, the id of its
+/// `max_rows`-th newest row; everything in that repo older than it is
+/// surplus. One window pass over the table, so compaction ranks rows once
+/// per run rather than once per delete batch.
+pub fn repo_limit_cutoffs(
+    conn: &Connection,
+    max_rows: u64,
+) -> rusqlite::Result<Vec<(String, i64)>> {
+    let mut stmt = conn.prepare_cached(
+        "SELECT repo, id FROM (
+             SELECT repo, id, ROW_NUMBER() OVER (PARTITION BY repo ORDER BY id DESC) AS rn
+             FROM notifications
+         )
+         WHERE rn = ?1",
+    )?;
+    let rows = stmt.query_map(params![max_rows as i64], |row| {
+        Ok((row.get(0)?, row.get(1)?))
+    })?;
+    rows.collect()
+}
+
+/// Delete up to `limit` notifications of `repo` older than `cutoff_id` (see
+/// `repo_limit_cutoffs`). Batched like `delete_expired_batch`; each batch is
+/// a range scan on `idx_notifications_repo_id`.
+pub fn delete_repo_before_batch(
+    conn: &Connection,
+    repo: &str,
+    cutoff_id: i64,
+    limit: usize,
+) -> rusqlite::Result<usize> {
+    conn.prepare_cached(
+        "DELETE FROM notifications WHERE id IN (
+             SELECT id FROM notifications
+             WHERE repo = ?1 AND id < ?2
+             LIMIT ?3
+         )",
+    )?
+    .execute(params![repo, cutoff_id, limit as i64])
+}
+
 pub fn get_latest_notification_by_pane(
     conn: &Connection,
     tmux_pane: &str,
 ) -> rusqlite::Result<Option<Notification>> {
-    let mut stmt = conn.prepare(
-        "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at
+    let mut stmt = conn.prepare_cached(
+        "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at, branch, teammate, team, task
          FROM notifications WHERE tmux_pane = ?1 ORDER BY id DESC LIMIT 1",
     )?;
     let mut rows = stmt.query_map(params![tmux_pane], row_to_notification)?;
@@ -171,29 +368,187 @@ pub fn get_latest_notification_by_pane(
     }
 }
 
+/// Largest `IN (...)` list per query. Stays below SQLite's historical
+/// `SQLITE_MAX_VARIABLE_NUMBER` default of 999.
+const PANE_LOOKUP_CHUNK: usize = 500;
+
+/// Which of `pane_ids` have at least one notification. One query per
+/// `PANE_LOOKUP_CHUNK` panes, so the sessions poller pays a constant cost per
+/// cycle instead of one lookup per pane sitting at its prompt.
+pub fn get_panes_with_notifications(
+    conn: &Connection,
+    pane_ids: &[&str],
+) -> rusqlite::Result<HashSet<String>> {
+    let mut found = HashSet::new();
+    for chunk in pane_ids.chunks(PANE_LOOKUP_CHUNK) {
+        // Arity varies per call; see delete_notifications_by_panes.
+        let placeholders: Vec<String> = (1..=chunk.len()).map(|i| format!("?{}", i)).collect();
+        let sql = format!(
+            "SELECT DISTINCT tmux_pane FROM notifications WHERE tmux_pane IN ({})",
+            placeholders.join(", ")
+        );
+        let mut stmt = conn.prepare(&sql)?;
+        let rows = stmt.query_map(rusqlite::params_from_iter(chunk.iter()), |row| {
+            row.get::<_, String>(0)
+        })?;
+        for pane in rows {
+            found.insert(pane?);
+        }
+    }
+    Ok(found)
+}
+
 pub fn get_notified_pane_ids(conn: &Connection) -> rusqlite::Result<Vec<String>> {
     let mut stmt =
-        conn.prepare("SELECT DISTINCT tmux_pane FROM notifications WHERE tmux_pane != ''")?;
+        conn.prepare_cached("SELECT DISTINCT tmux_pane FROM notifications WHERE tmux_pane != ''")?;
     let rows = stmt.query_map([], |row| row.get(0))?;
     rows.collect()
 }
 
 pub fn get_max_id(conn: &Connection) -> rusqlite::Result<i64> {
-    conn.query_row(
-        "SELECT COALESCE(MAX(id), 0) FROM notifications",
-        [],
-        |row| row.get(0),
-    )
+    conn.prepare_cached("SELECT COALESCE(MAX(id), 0) FROM notifications")?
+        .query_row([], |row| row.get(0))
 }
 
 pub fn get_notifications_after_id(
     conn: &Connection,
     after_id: i64,
 ) -> rusqlite::Result<Vec<Notification>> {
-    let mut stmt = conn.prepare(
-        "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at
+    let mut stmt = conn.prepare_cached(
+        "SELECT id, badge, body, badge_color, icon, metadata, repo, tmux_pane, terminal_bundle_id, force_focus, is_read, created_at, branch, teammate, team, task
          FROM notifications WHERE id > ?1 ORDER BY id ASC",
     )?;
     let rows = stmt.query_map(params![after_id], row_to_notification)?;
     rows.collect()
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn insert(conn: &Connection, body: &str, branch: &str) {
+        let metadata = HashMap::from([("branch".to_string(), branch.to_string())]);
+        insert_notification(
+            conn,
+            &NotificationInput {
+                badge: "Stop",
+                body,
+                badge_color: "green",
+                icon: &IconType::Agentoast,
+                metadata: &metadata,
+                repo: "agentoast",
+                tmux_pane: "",
+                terminal_bundle_id: "",
+                force_focus: false,
+            },
+        )
+        .unwrap();
+    }
+
+    #[test]
+    fn metadata_round_trips_through_columns_and_json() {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = open(&tmp.path().join("notifications.db")).unwrap();
+        let metadata = HashMap::from([
+            ("branch".to_string(), "main".to_string()),
+            ("task".to_string(), "lint".to_string()),
+            ("pr".to_string(), "12".to_string()),
+        ]);
+        insert_notification(
+            &conn,
+            &NotificationInput {
+                badge: "Stop",
+                body: "",
+                badge_color: "green",
+                icon: &IconType::Agentoast,
+                metadata: &metadata,
+                repo: "agentoast",
+                tmux_pane: "%1",
+                terminal_bundle_id: "",
+                force_focus: false,
+            },
+        )
+        .unwrap();
+
+        let (branch, json): (String, String) = conn
+            .query_row("SELECT branch, metadata FROM notifications", [], |row| {
+                Ok((row.get(0)?, row.get(1)?))
+            })
+            .unwrap();
+        assert_eq!(branch, "main");
+        assert_eq!(json, r#"{"pr":"12"}"#);
+
+        let n = get_latest_notification_by_pane(&conn, "%1")
+            .unwrap()
+            .unwrap();
+        assert_eq!(n.metadata, metadata);
+    }
+
+    #[test]
+    fn empty_metadata_value_round_trips() {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = open(&tmp.path().join("notifications.db")).unwrap();
+        let metadata = HashMap::from([
+            ("branch".to_string(), String::new()),
+            ("pr".to_string(), String::new()),
+        ]);
+        insert_notification(
+            &conn,
+            &NotificationInput {
+                badge: "Stop",
+                body: "",
+                badge_color: "green",
+                icon: &IconType::Agentoast,
+                metadata: &metadata,
+                repo: "agentoast",
+                tmux_pane: "%1",
+                terminal_bundle_id: "",
+                force_focus: false,
+            },
+        )
+        .unwrap();
+
+        let (branch, team): (Option<String>, Option<String>) = conn
+            .query_row("SELECT branch, team FROM notifications", [], |row| {
+                Ok((row.get(0)?, row.get(1)?))
+            })
+            .unwrap();
+        assert_eq!(branch.as_deref(), Some(""));
+        assert_eq!(team, None);
+
+        let n = get_latest_notification_by_pane(&conn, "%1")
+            .unwrap()
+            .unwrap();
+        assert_eq!(n.metadata, metadata);
+    }
+
+    #[test]
+    fn search_matches_prefixes_across_columns() {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = open(&tmp.path().join("notifications.db")).unwrap();
+        insert(&conn, "Build finished", "main");
+        insert(&conn, "Tests failed", "feature/search");
+
+        let bodies = |query: &str| -> Vec<String> {
+            search_notifications(&conn, query, 10)
+                .unwrap()
+                .into_iter()
+                .map(|n| n.body)
+                .collect()
+        };
+        assert_eq!(bodies("fin"), vec!["Build finished"]);
+        assert_eq!(bodies("search"), vec!["Tests failed"]);
+        assert_eq!(bodies("agentoast fail"), vec!["Tests failed"]);
+        assert!(bodies("   ").is_empty());
+    }
+
+    #[test]
+    fn search_treats_fts_syntax_as_text() {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = open(&tmp.path().join("notifications.db")).unwrap();
+        insert(&conn, "say \"hello\" AND bye", "main");
+
+        assert_eq!(search_notifications(&conn, "\"hello", 10).unwrap().len(), 1);
+        assert!(search_notifications(&conn, "NOT (", 10).is_ok());
+    }
+}
@@ -14,12 +14,29 @@
 //!
 //! Bare repositories resolve to None, matching `--show-toplevel` failing
 //! outside a work tree.
+//!
+//! The stable part (repo_root, repo_name, gitdir) is also persisted under
+//! `config::git_info_cache_dir()`, one small file per path, so short-lived
+//! hook processes and a freshly restarted app skip the directory walk and
+//! the config parse at the cost of reading one entry. A persisted entry is
+//! trusted for `DISK_CACHE_TTL`, while `<common_dir>/config` keeps its mtime
+//! (origin URL unchanged), while no `.git` has appeared between the path and
+//! the cached root (nested repo, new submodule), and while the gitdir's HEAD
+//! is still readable. Neither hooks nor the poller write on the lookup path:
+//! misses are queued for `flush_persistent_cache`, which the CLI calls after
+//! the notification has been delivered and the app calls from a background
+//! thread every `PERSIST_INTERVAL`.
 
+use std::collections::hash_map::DefaultHasher;
 use std::collections::HashMap;
 use std::fs;
+use std::hash::{Hash, Hasher};
 use std::path::{Path, PathBuf};
-use std::sync::{Mutex, OnceLock};
-use std::time::{Duration, Instant};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Mutex, OnceLock, RwLock};
+use std::time::{Duration, Instant, SystemTime, UNIX_EPOCH};
+
+use serde::{Deserialize, Serialize};
 
 #[derive(Debug, Clone)]
 pub struct GitInfo {
@@ -30,107 +47,654 @@ pub struct GitInfo {
 
 /// Stable per-path facts cached across polling cycles. `branch` is excluded:
 /// it changes on checkout, so it is re-read from HEAD on every lookup.
-#[derive(Debug, Clone)]
+#[derive(Debug, Clone, Serialize, Deserialize)]
 struct StableRepoInfo {
     repo_root: String,
     repo_name: String,
     /// Directory containing this work tree's HEAD (worktree-specific gitdir).
     gitdir: PathBuf,
+    /// Directory whose `config` supplied `repo_name`.
+    common_dir: PathBuf,
+}
+
+impl StableRepoInfo {
+    /// Attach the current branch. None when HEAD is unreadable, i.e. the
+    /// gitdir is gone and the entry must be re-resolved.
+    fn with_current_branch(&self) -> Option<GitInfo> {
+        Some(GitInfo {
+            repo_root: self.repo_root.clone(),
+            repo_name: self.repo_name.clone(),
+            branch: read_head_branch(&self.gitdir)?,
+        })
+    }
+}
+
+/// Branch checked out in `gitdir` (inner None when detached). None when HEAD
+/// cannot be read.
+fn read_head_branch(gitdir: &Path) -> Option<Option<String>> {
+    let head = fs::read_to_string(gitdir.join("HEAD")).ok()?;
+    Some(parse_head_branch(&head))
 }
 
 struct CacheEntry {
     /// None = path was not inside a git work tree when last probed.
     resolved: Option<StableRepoInfo>,
+    /// When the path was resolved, or for watched entries when HEAD was
+    /// last read.
     checked_at: Instant,
+    /// Branch as of the last HEAD read; served from memory only while
+    /// `watched` and younger than `WATCHED_REVALIDATE_AFTER`.
+    branch: Option<String>,
+    /// The watch hook covers this entry's gitdir and common dir, so any
+    /// change reaches `refresh_head` or `invalidate_gitdir` and HEAD need not
+    /// be re-read.
+    watched: bool,
+    /// `CLOCK` value at the last lookup, for LRU eviction. Atomic so a hit
+    /// only needs its shard's read lock.
+    last_used: AtomicU64,
 }
 
 /// Non-git directories are re-probed after this TTL so a later `git init`
 /// (or a worktree appearing at the same path) is eventually picked up.
 const NEGATIVE_TTL: Duration = Duration::from_secs(30);
 
-static CACHE: OnceLock<Mutex<HashMap<String, CacheEntry>>> = OnceLock::new();
+/// Watched entries still re-read HEAD this often. Watch events are not
+/// guaranteed delivery (macOS FSEvents can drop some while the stream
+/// restarts to add a path), so this bounds how long a missed checkout can
+/// show the old branch.
+const WATCHED_REVALIDATE_AFTER: Duration = Duration::from_secs(5);
+
+/// Upper bound on cached paths. Agents that `cd` into throwaway worktrees
+/// would otherwise grow the cache for the life of the app. Enforced per
+/// shard, least recently used first.
+const CACHE_CAPACITY: usize = 1024;
+
+/// Paths are spread over independently locked shards so pollers and the
+/// watcher rarely contend on one lock.
+const SHARD_COUNT: usize = 16;
+
+const SHARD_CAPACITY: usize = CACHE_CAPACITY / SHARD_COUNT;
+
+/// Counters are logged at debug level every this many lookups.
+const STATS_LOG_INTERVAL: u64 = 4096;
+
+type Shard = RwLock<HashMap<String, CacheEntry>>;
+
+static CACHE: OnceLock<[Shard; SHARD_COUNT]> = OnceLock::new();
+
+/// Logical time for `CacheEntry::last_used`.
+static CLOCK: AtomicU64 = AtomicU64::new(0);
+
+static LOOKUPS: AtomicU64 = AtomicU64::new(0);
+static HITS: AtomicU64 = AtomicU64::new(0);
+static MISSES: AtomicU64 = AtomicU64::new(0);
+static EVICTIONS: AtomicU64 = AtomicU64::new(0);
+
+/// Counters for `resolve_git_info`'s in-memory cache since startup.
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct CacheStats {
+    /// Answered from memory (including fresh negative entries).
+    pub hits: u64,
+    /// Resolved from the persistent cache or from disk.
+    pub misses: u64,
+    pub evictions: u64,
+    pub entries: usize,
+}
+
+pub fn cache_stats() -> CacheStats {
+    let entries = CACHE.get().map_or(0, |shards| {
+        shards.iter().map(|s| s.read().map_or(0, |g| g.len())).sum()
+    });
+    CacheStats {
+        hits: HITS.load(Ordering::Relaxed),
+        misses: MISSES.load(Ordering::Relaxed),
+        evictions: EVICTIONS.load(Ordering::Relaxed),
+        entries,
+    }
+}
+
+fn shards() -> &'static [Shard; SHARD_COUNT] {
+    CACHE.get_or_init(|| std::array::from_fn(|_| RwLock::new(HashMap::new())))
+}
+
+fn shard_for(path: &str) -> &'static Shard {
+    let mut hasher = DefaultHasher::new();
+    path.hash(&mut hasher);
+    &shards()[hasher.finish() as usize % SHARD_COUNT]
+}
+
+fn tick() -> u64 {
+    CLOCK.fetch_add(1, Ordering::Relaxed) + 1
+}
+
+fn record(counter: &AtomicU64) {
+    counter.fetch_add(1, Ordering::Relaxed);
+    let lookups = LOOKUPS.fetch_add(1, Ordering::Relaxed) + 1;
+    if lookups.is_multiple_of(STATS_LOG_INTERVAL) {
+        log::debug!("git_info cache: {:?}", cache_stats());
+    }
+}
+
+/// Remove least recently used entries until `entries` fits `capacity`, and
+/// return them so their watches can be released.
+fn evict_lru(entries: &mut HashMap<String, CacheEntry>, capacity: usize) -> Vec<CacheEntry> {
+    let mut evicted = Vec::new();
+    while entries.len() > capacity {
+        let Some(oldest) = entries
+            .iter()
+            .min_by_key(|(_, e)| e.last_used.load(Ordering::Relaxed))
+            .map(|(k, _)| k.clone())
+        else {
+            break;
+        };
+        evicted.extend(entries.remove(&oldest));
+        EVICTIONS.fetch_add(1, Ordering::Relaxed);
+    }
+    evicted
+}
+
+type WatchFn = Box<dyn Fn(&Path, &Path) -> bool + Send + Sync>;
+type ReleaseFn = Box<dyn Fn(&Path, &Path) + Send + Sync>;
+
+struct WatchHooks {
+    watch: WatchFn,
+    release: ReleaseFn,
+}
+
+static WATCH_HOOKS: OnceLock<WatchHooks> = OnceLock::new();
+
+/// Install a filesystem watcher for cached repositories (the app does this;
+/// the CLI never does). `watch(gitdir, common_dir)` runs once per newly
+/// cached path and returns whether both directories are now watched. From
+/// then on that path is answered from memory, updated by the watcher through
+/// `refresh_head` (HEAD, packed-refs) and dropped through `invalidate_gitdir`
+/// (config, directory removed), apart from a HEAD re-read every
+/// `WATCHED_REVALIDATE_AFTER` in case an event was lost. Entries whose watch
+/// failed keep re-reading HEAD.
+///
+/// Every successful `watch` is matched by exactly one `release(gitdir,
+/// common_dir)` once its entry leaves the cache (evicted, invalidated or
+/// re-resolved), so the watcher can reference-count directories and stop
+/// watching repositories nothing refers to any more. Neither hook is called
+/// with a cache lock held. Only the first call takes effect.
+pub fn set_watch_hooks(
+    watch: impl Fn(&Path, &Path) -> bool + Send + Sync + 'static,
+    release: impl Fn(&Path, &Path) + Send + Sync + 'static,
+) -> bool {
+    WATCH_HOOKS
+        .set(WatchHooks {
+            watch: Box::new(watch),
+            release: Box::new(release),
+        })
+        .is_ok()
+}
+
+/// Hand the watches held by entries that just left the cache back to the
+/// watcher. Call with no cache lock held.
+fn release_watches(dropped: Vec<CacheEntry>) {
+    let Some(hooks) = WATCH_HOOKS.get() else {
+        return;
+    };
+    for entry in dropped {
+        if let (true, Some(stable)) = (entry.watched, &entry.resolved) {
+            (hooks.release)(&stable.gitdir, &stable.common_dir);
+        }
+    }
+}
+
+/// Re-read HEAD for every cached path whose gitdir or common dir is `dir` (as
+/// passed to the watch hook) and update its branch in place, so the entry and
+/// its watch survive a checkout. Entries whose HEAD is gone are dropped as by
+/// `invalidate_gitdir`. Returns whether any branch changed or entry was dropped.
+pub fn refresh_head(dir: &Path) -> bool {
+    let Some(shards) = CACHE.get() else {
+        return false;
+    };
+    // Worktrees sharing a common dir each have their own HEAD; read each once.
+    let mut heads: HashMap<PathBuf, Option<Option<String>>> = HashMap::new();
+    let mut changed = false;
+    let mut dropped = Vec::new();
+    for shard in shards {
+        let Ok(mut guard) = shard.write() else {
+            continue;
+        };
+        dropped.extend(
+            guard
+                .extract_if(|_, entry| {
+                    let head = match &entry.resolved {
+                        Some(stable) if stable.gitdir == dir || stable.common_dir == dir => heads
+                            .entry(stable.gitdir.clone())
+                            .or_insert_with(|| read_head_branch(&stable.gitdir))
+                            .clone(),
+                        _ => return false,
+                    };
+                    let Some(branch) = head else {
+                        return true;
+                    };
+                    changed |= entry.branch != branch;
+                    entry.branch = branch;
+                    entry.checked_at = Instant::now();
+                    false
+                })
+                .map(|(_, entry)| entry),
+        );
+    }
+    changed |= !dropped.is_empty();
+    release_watches(dropped);
+    changed
+}
+
+/// Drop every cached path whose gitdir or common dir is `dir` (as passed to
+/// the watch hook). Returns whether anything was dropped.
+pub fn invalidate_gitdir(dir: &Path) -> bool {
+    let Some(shards) = CACHE.get() else {
+        return false;
+    };
+    let mut dropped = Vec::new();
+    for shard in shards {
+        let Ok(mut guard) = shard.write() else {
+            continue;
+        };
+        dropped.extend(
+            guard
+                .extract_if(|_, entry| {
+                    entry
+                        .resolved
+                        .as_ref()
+                        .is_some_and(|stable| stable.gitdir == dir || stable.common_dir == dir)
+                })
+                .map(|(_, entry)| entry),
+        );
+    }
+    let any = !dropped.is_empty();
+    release_watches(dropped);
+    any
+}
+
+/// Outcome of consulting the in-memory cache.
+enum Lookup {
+    Hit(Option<GitInfo>),
+    /// Watched entry past `WATCHED_REVALIDATE_AFTER`; HEAD was re-read and
+    /// the entry should be refreshed with the result.
+    Revalidated(GitInfo),
+    /// No entry: worth checking the persistent cache.
+    FirstSight,
+    /// Entry present but expired or stale.
+    Stale,
+}
+
+fn lookup_cached(shard: &Shard, current_path: &str) -> Option<Lookup> {
+    let guard = shard.read().ok()?;
+    let Some(entry) = guard.get(current_path) else {
+        return Some(Lookup::FirstSight);
+    };
+    let hit = match &entry.resolved {
+        Some(stable) if entry.watched && entry.checked_at.elapsed() >= WATCHED_REVALIDATE_AFTER => {
+            entry.last_used.store(tick(), Ordering::Relaxed);
+            return Some(match stable.with_current_branch() {
+                Some(info) => Lookup::Revalidated(info),
+                None => Lookup::Stale,
+            });
+        }
+        Some(stable) if entry.watched => Some(GitInfo {
+            repo_root: stable.repo_root.clone(),
+            repo_name: stable.repo_name.clone(),
+            branch: entry.branch.clone(),
+        }),
+        // HEAD readable → repo still exists; branch is current. Otherwise the
+        // gitdir vanished and the path is re-resolved.
+        Some(stable) => match stable.with_current_branch() {
+            Some(info) => Some(info),
+            None => return Some(Lookup::Stale),
+        },
+        None if entry.checked_at.elapsed() < NEGATIVE_TTL => None,
+        None => return Some(Lookup::Stale),
+    };
+    entry.last_used.store(tick(), Ordering::Relaxed);
+    Some(Lookup::Hit(hit))
+}
 
 /// Cached resolver for long-running processes (the GUI poller). The stable
-/// part (repo_root, repo_name) is cached per path; the branch is re-read from
-/// HEAD on every call so checkouts show up within one polling cycle. If the
+/// part (repo_root, repo_name) is cached per path. Without a watch hook the
+/// branch is re-read from HEAD on every call so checkouts show up within one
+/// polling cycle; with one, watched entries are memory reads between HEAD
+/// re-reads every `WATCHED_REVALIDATE_AFTER`. If the
 /// gitdir disappears (worktree pruned, repo deleted), the entry is dropped
-/// and the path is re-resolved from scratch.
+/// and the path is re-resolved from scratch. Paths seen for the first time
+/// are looked up in the persistent cache before walking the tree. No lock is
+/// held while resolving, so a slow filesystem only delays its own path.
 pub fn resolve_git_info(current_path: &str) -> Option<GitInfo> {
-    let cache = CACHE.get_or_init(|| Mutex::new(HashMap::new()));
-    let mut guard = match cache.lock() {
-        Ok(g) => g,
-        Err(_) => return resolve_git_info_uncached(Path::new(current_path)),
-    };
-
-    if let Some(entry) = guard.get(current_path) {
-        match &entry.resolved {
-            Some(stable) => {
-                // HEAD readable → repo still exists; branch is current.
-                if let Ok(head) = fs::read_to_string(stable.gitdir.join("HEAD")) {
-                    return Some(GitInfo {
-                        repo_root: stable.repo_root.clone(),
-                        repo_name: stable.repo_name.clone(),
-                        branch: parse_head_branch(&head),
-                    });
+    let shard = shard_for(current_path);
+    let first_sight = match lookup_cached(shard, current_path) {
+        Some(Lookup::Hit(info)) => {
+            record(&HITS);
+            return info;
+        }
+        Some(Lookup::Revalidated(info)) => {
+            record(&HITS);
+            if let Ok(mut guard) = shard.write() {
+                if let Some(entry) = guard.get_mut(current_path) {
+                    entry.branch = info.branch.clone();
+                    entry.checked_at = Instant::now();
                 }
-                // gitdir vanished — fall through to a fresh resolve below.
             }
-            None => {
-                if entry.checked_at.elapsed() < NEGATIVE_TTL {
-                    return None;
-                }
+            return Some(info);
+        }
+        Some(Lookup::FirstSight) => true,
+        Some(Lookup::Stale) => false,
+        None => return resolve_git_info_uncached(Path::new(current_path)),
+    };
+    record(&MISSES);
+
+    let disk_dir = disk_cache_dir();
+    let persisted = match &disk_dir {
+        Some(dir) if first_sight => disk_lookup(dir, current_path)
+            .and_then(|stable| Some((stable.with_current_branch()?, stable))),
+        _ => None,
+    };
+    let (result, resolved) = match persisted {
+        Some((info, stable)) => (Some(info), Some(stable)),
+        None => {
+            let fresh = resolve_stable(Path::new(current_path));
+            if let (Some(dir), Some(stable)) = (&disk_dir, &fresh) {
+                queue_disk_write(dir, current_path, stable);
             }
+            (fresh.as_ref().map(resolve_branch_lenient), fresh)
         }
+    };
+
+    let mut dropped = Vec::new();
+    if let Ok(mut guard) = shard.write() {
+        dropped.extend(guard.insert(
+            current_path.to_string(),
+            CacheEntry {
+                resolved: resolved.clone(),
+                checked_at: Instant::now(),
+                branch: result.as_ref().and_then(|info| info.branch.clone()),
+                watched: false,
+                last_used: AtomicU64::new(tick()),
+            },
+        ));
+        dropped.extend(evict_lru(&mut guard, SHARD_CAPACITY));
     }
+    release_watches(dropped);
 
-    let path = Path::new(current_path);
-    let fresh = resolve_dirs(path).map(|dirs| {
-        let repo_name = read_origin_url(&dirs.common_dir)
-            .and_then(|url| extract_repo_name_from_url(&url))
-            .unwrap_or_else(|| last_component(&dirs.repo_root));
-        StableRepoInfo {
-            repo_root: dirs.repo_root,
-            repo_name,
-            gitdir: dirs.gitdir,
+    if let Some(stable) = &resolved {
+        watch(current_path, stable);
+    }
+    result
+}
+
+/// Hand `stable`'s directories to the watch hook and mark the entry as
+/// watched. Runs without the cache lock held: the hook may wait on the
+/// watcher, whose event callback takes that lock in `invalidate_gitdir`.
+/// If the entry cannot take ownership of the watch (evicted or replaced in
+/// the meantime, HEAD gone), it is released straight away.
+fn watch(current_path: &str, stable: &StableRepoInfo) {
+    let Some(hooks) = WATCH_HOOKS.get() else {
+        return;
+    };
+    if !(hooks.watch)(&stable.gitdir, &stable.common_dir) {
+        return;
+    }
+    // HEAD may have moved before the watch was in place; read it once more
+    // now that later changes are covered.
+    let owned = stable.with_current_branch().is_some_and(|info| {
+        let Ok(mut guard) = shard_for(current_path).write() else {
+            return false;
+        };
+        match guard.get_mut(current_path) {
+            Some(entry)
+                if !entry.watched
+                    && entry
+                        .resolved
+                        .as_ref()
+                        .is_some_and(|s| s.gitdir == stable.gitdir) =>
+            {
+                entry.branch = info.branch;
+                entry.checked_at = Instant::now();
+                entry.watched = true;
+                true
+            }
+            _ => false,
         }
     });
+    if !owned {
+        (hooks.release)(&stable.gitdir, &stable.common_dir);
+    }
+}
 
-    let result = fresh.as_ref().map(|stable| GitInfo {
-        repo_root: stable.repo_root.clone(),
-        repo_name: stable.repo_name.clone(),
-        branch: fs::read_to_string(stable.gitdir.join("HEAD"))
-            .ok()
-            .and_then(|h| parse_head_branch(&h)),
-    });
+/// Resolver for short-lived processes (CLI hooks): no in-process cache, but
+/// the persistent cache turns a repeat lookup into one small read, a few
+/// stats and a HEAD read. A miss is queued for `flush_persistent_cache`
+/// rather than written here.
+pub fn resolve_git_info_persistent(path: &Path) -> Option<GitInfo> {
+    let dir = disk_cache_dir()?;
+    resolve_persistent_in(&dir, path)
+}
 
-    guard.insert(
-        current_path.to_string(),
-        CacheEntry {
-            resolved: fresh,
-            checked_at: Instant::now(),
-        },
-    );
+fn resolve_persistent_in(dir: &Path, path: &Path) -> Option<GitInfo> {
+    let key = path.to_string_lossy();
+    if let Some(info) = disk_lookup(dir, &key).and_then(|stable| stable.with_current_branch()) {
+        return Some(info);
+    }
 
-    result
+    let stable = resolve_stable(path)?;
+    let info = resolve_branch_lenient(&stable);
+    queue_disk_write(dir, &key, &stable);
+    Some(info)
 }
 
-/// One-shot resolver for short-lived processes (CLI hooks) where caching has
-/// no benefit.
+fn queue_disk_write(dir: &Path, key: &str, stable: &StableRepoInfo) {
+    if let Ok(mut pending) = PENDING_WRITES.lock() {
+        pending.push((dir.to_path_buf(), key.to_string(), stable.clone()));
+    }
+}
+
+/// Write the entries the resolvers had to resolve from scratch. The CLI
+/// calls this once its real work (insert, wake) is done and the app every
+/// `PERSIST_INTERVAL` from a background thread, so a cache miss never
+/// delays a notification or a sessions refresh.
+pub fn flush_persistent_cache() {
+    let pending = match PENDING_WRITES.lock() {
+        Ok(mut pending) => std::mem::take(&mut *pending),
+        Err(_) => return,
+    };
+    let mut created = false;
+    for (dir, key, stable) in &pending {
+        created |= disk_store(dir, key, stable);
+    }
+    // Overwriting an existing entry cannot push the directory over the cap.
+    if let (true, Some((dir, _, _))) = (created, pending.first()) {
+        prune_disk_cache(dir);
+    }
+}
+
+/// One-shot resolver that touches no cache at all.
 pub fn resolve_git_info_uncached(path: &Path) -> Option<GitInfo> {
+    resolve_stable(path).map(|stable| resolve_branch_lenient(&stable))
+}
+
+/// A freshly resolved repo whose HEAD cannot be read still reports the
+/// repo, just without a branch (as `git branch --show-current` would fail).
+fn resolve_branch_lenient(stable: &StableRepoInfo) -> GitInfo {
+    stable.with_current_branch().unwrap_or_else(|| GitInfo {
+        repo_root: stable.repo_root.clone(),
+        repo_name: stable.repo_name.clone(),
+        branch: None,
+    })
+}
+
+/// Walk the tree and read the origin URL: the full, uncached resolution.
+fn resolve_stable(path: &Path) -> Option<StableRepoInfo> {
     let dirs = resolve_dirs(path)?;
     let repo_name = read_origin_url(&dirs.common_dir)
         .and_then(|url| extract_repo_name_from_url(&url))
         .unwrap_or_else(|| last_component(&dirs.repo_root));
-    let branch = fs::read_to_string(dirs.gitdir.join("HEAD"))
-        .ok()
-        .and_then(|h| parse_head_branch(&h));
-    Some(GitInfo {
+    Some(StableRepoInfo {
         repo_root: dirs.repo_root,
         repo_name,
-        branch,
+        gitdir: dirs.gitdir,
+        common_dir: dirs.common_dir,
     })
 }
 
+/// Persisted entries older than this are re-resolved. Bounds how long any
+/// change the other checks miss (an origin set through `[include]`, a moved
+/// gitdir) can go unnoticed.
+const DISK_CACHE_TTL: Duration = Duration::from_secs(10 * 60);
+
+/// Upper bound on persisted paths; the least recently written go first.
+const DISK_CACHE_MAX_ENTRIES: usize = 512;
+
+/// How often the app writes queued entries with `flush_persistent_cache`.
+pub const PERSIST_INTERVAL: Duration = Duration::from_secs(10);
+
+/// Bumped whenever `DiskEntry` changes shape; older entries are ignored.
+const DISK_CACHE_VERSION: u32 = 2;
+
+/// Resolved from scratch by `resolve_git_info` or
+/// `resolve_git_info_persistent`, waiting for `flush_persistent_cache`:
+/// (cache dir, path, info).
+static PENDING_WRITES: Mutex<Vec<(PathBuf, String, StableRepoInfo)>> = Mutex::new(Vec::new());
+
+/// One persisted path, stored as `<cache dir>/<fnv1a(path)>.json`.
+#[derive(Debug, Clone, Serialize, Deserialize)]
+struct DiskEntry {
+    version: u32,
+    /// The cached path itself, to reject file-name hash collisions.
+    path: String,
+    #[serde(flatten)]
+    stable: StableRepoInfo,
+    /// mtime (ns since epoch) of `<common_dir>/config` when resolved; None
+    /// if it did not exist.
+    config_mtime_ns: Option<u64>,
+    /// How many directories, starting at `path` and walking up, had no
+    /// `.git` when resolved. Re-probed on lookup: a hit there means a repo
+    /// now sits between `path` and the cached root.
+    depth: u32,
+    /// Seconds since epoch, for `DISK_CACHE_TTL`.
+    resolved_at: u64,
+}
+
+/// None in unit tests, which exercise the persistent cache through
+/// `resolve_persistent_in` with a temp dir instead of the real data dir.
+fn disk_cache_dir() -> Option<PathBuf> {
+    if cfg!(test) {
+        None
+    } else {
+        Some(crate::config::git_info_cache_dir())
+    }
+}
+
+/// FNV-1a: unlike `DefaultHasher`, stable across builds, so the CLI and the
+/// app agree on file names whichever compiled them.
+fn fnv1a(bytes: &[u8]) -> u64 {
+    bytes.iter().fold(0xcbf2_9ce4_8422_2325, |hash, &b| {
+        (hash ^ u64::from(b)).wrapping_mul(0x0000_0100_0000_01b3)
+    })
+}
+
+fn disk_entry_path(dir: &Path, key: &str) -> PathBuf {
+    dir.join(format!("{:016x}.json", fnv1a(key.as_bytes())))
+}
+
+fn now_secs() -> u64 {
+    SystemTime::now()
+        .duration_since(UNIX_EPOCH)
+        .map_or(0, |d| d.as_secs())
+}
+
+fn mtime_ns(path: &Path) -> Option<u64> {
+    let modified = fs::metadata(path).ok()?.modified().ok()?;
+    let since_epoch = modified.duration_since(UNIX_EPOCH).ok()?;
+    Some(since_epoch.as_nanos() as u64)
+}
+
+fn has_dot_git(dir: &Path) -> bool {
+    fs::symlink_metadata(dir.join(".git")).is_ok()
+}
+
+/// The persisted entry for `key`, if it is still trustworthy (see the module
+/// docs). Whether the gitdir still exists is left to the caller's HEAD read.
+fn disk_lookup(dir: &Path, key: &str) -> Option<StableRepoInfo> {
+    let bytes = fs::read(disk_entry_path(dir, key)).ok()?;
+    let entry: DiskEntry = serde_json::from_slice(&bytes).ok()?;
+    if entry.version != DISK_CACHE_VERSION || entry.path != key {
+        return None;
+    }
+    if now_secs().saturating_sub(entry.resolved_at) >= DISK_CACHE_TTL.as_secs() {
+        return None;
+    }
+    if mtime_ns(&entry.stable.common_dir.join("config")) != entry.config_mtime_ns {
+        return None;
+    }
+    let shadowed = Path::new(key)
+        .ancestors()
+        .take(entry.depth as usize)
+        .any(has_dot_git);
+    if shadowed {
+        return None;
+    }
+    Some(entry.stable)
+}
+
+/// Atomically write the entry for `key`. Best effort: a failed write only
+/// costs a re-resolve next time. Returns whether a new file was created.
+fn disk_store(dir: &Path, key: &str, stable: &StableRepoInfo) -> bool {
+    let depth = Path::new(key)
+        .ancestors()
+        .take_while(|d| !has_dot_git(d))
+        .count();
+    let entry = DiskEntry {
+        version: DISK_CACHE_VERSION,
+        path: key.to_string(),
+        stable: stable.clone(),
+        config_mtime_ns: mtime_ns(&stable.common_dir.join("config")),
+        depth: depth as u32,
+        resolved_at: now_secs(),
+    };
+    let Ok(bytes) = serde_json::to_vec(&entry) else {
+        return false;
+    };
+    fs::create_dir_all(dir).ok();
+    let path = disk_entry_path(dir, key);
+    let created = !path.exists();
+    let tmp = path.with_extension(format!("{}.tmp", std::process::id()));
+    if let Err(e) = fs::write(&tmp, bytes).and_then(|()| fs::rename(&tmp, &path)) {
+        log::debug!("git_info: failed to write {}: {}", path.display(), e);
+        fs::remove_file(&tmp).ok();
+        return false;
+    }
+    created
+}
+
+/// Delete the least recently written entries beyond `DISK_CACHE_MAX_ENTRIES`.
+/// Runs after writes only, never on the lookup path, and only stats the
+/// entries once the directory is actually over the cap.
+fn prune_disk_cache(dir: &Path) {
+    let Ok(read_dir) = fs::read_dir(dir) else {
+        return;
+    };
+    let paths: Vec<PathBuf> = read_dir
+        .flatten()
+        .map(|e| e.path())
+        .filter(|p| p.extension().is_some_and(|ext| ext == "json"))
+        .collect();
+    if paths.len() <= DISK_CACHE_MAX_ENTRIES {
+        return;
+    }
+    let mut files: Vec<(SystemTime, PathBuf)> = paths
+        .into_iter()
+        .filter_map(|p| Some((fs::metadata(&p).ok()?.modified().ok()?, p)))
+        .collect();
+    files.sort();
+    let excess = files.len().saturating_sub(DISK_CACHE_MAX_ENTRIES);
+    for (_, path) in files.into_iter().take(excess) {
+        fs::remove_file(path).ok();
+    }
+}
+
 struct ResolvedDirs {
     repo_root: String,
     /// Where this work tree's HEAD lives. For worktrees this is the
@@ -410,6 +974,218 @@ mod tests {
         assert!(resolve_git_info(&key).is_none());
     }
 
+    #[test]
+    fn invalidate_gitdir_drops_matching_entries() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("watched");
+        make_repo(&root, "main", None);
+        let key = root.to_string_lossy().into_owned();
+        assert!(resolve_git_info(&key).is_some());
+
+        let gitdir = root.join(".git");
+        assert!(invalidate_gitdir(&gitdir));
+        assert!(!invalidate_gitdir(&gitdir));
+        assert!(resolve_git_info(&key).is_some());
+    }
+
+    #[test]
+    fn refresh_head_updates_branch_in_place() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("checkout");
+        make_repo(&root, "main", None);
+        let key = root.to_string_lossy().into_owned();
+        assert!(resolve_git_info(&key).is_some());
+        shard_for(&key)
+            .write()
+            .unwrap()
+            .get_mut(&key)
+            .unwrap()
+            .watched = true;
+
+        let gitdir = root.join(".git");
+        fs::write(gitdir.join("HEAD"), "ref: refs/heads/topic\n").unwrap();
+        assert!(refresh_head(&gitdir));
+        assert!(!refresh_head(&gitdir));
+        {
+            let guard = shard_for(&key).read().unwrap();
+            let entry = guard.get(&key).unwrap();
+            assert!(entry.watched);
+            assert_eq!(entry.branch.as_deref(), Some("topic"));
+        }
+        assert_eq!(
+            resolve_git_info(&key).unwrap().branch.as_deref(),
+            Some("topic")
+        );
+
+        fs::remove_file(gitdir.join("HEAD")).unwrap();
+        assert!(refresh_head(&gitdir));
+        assert!(!shard_for(&key).read().unwrap().contains_key(&key));
+    }
+
+    #[test]
+    fn watched_entry_rereads_head_once_revalidation_is_due() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("watched-stale");
+        make_repo(&root, "main", None);
+        let key = root.to_string_lossy().into_owned();
+        assert!(resolve_git_info(&key).is_some());
+
+        // Simulate a watched entry whose checkout event was lost.
+        let set_checked_at = |checked_at: Instant| {
+            let mut guard = shard_for(&key).write().unwrap();
+            let entry = guard.get_mut(&key).unwrap();
+            entry.watched = true;
+            entry.checked_at = checked_at;
+        };
+        set_checked_at(Instant::now());
+        fs::write(root.join(".git/HEAD"), "ref: refs/heads/missed\n").unwrap();
+        let cached = resolve_git_info(&key).unwrap();
+        assert_eq!(cached.branch.as_deref(), Some("main"));
+
+        let Some(expired) = Instant::now().checked_sub(WATCHED_REVALIDATE_AFTER) else {
+            return;
+        };
+        set_checked_at(expired);
+        let revalidated = resolve_git_info(&key).unwrap();
+        assert_eq!(revalidated.branch.as_deref(), Some("missed"));
+    }
+
+    #[test]
+    fn lru_evicts_least_recently_used() {
+        let entry = |last_used| CacheEntry {
+            resolved: None,
+            checked_at: Instant::now(),
+            branch: None,
+            watched: false,
+            last_used: AtomicU64::new(last_used),
+        };
+        let mut entries = HashMap::from([
+            ("a".to_string(), entry(3)),
+            ("b".to_string(), entry(1)),
+            ("c".to_string(), entry(2)),
+        ]);
+        assert_eq!(evict_lru(&mut entries, 2).len(), 1);
+        assert!(!entries.contains_key("b"));
+        assert_eq!(entries.len(), 2);
+        assert_eq!(evict_lru(&mut entries, 1).len(), 1);
+        assert!(entries.contains_key("a"));
+    }
+
+    #[test]
+    fn repeat_lookup_counts_as_hit() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("counted");
+        make_repo(&root, "main", None);
+        let key = root.to_string_lossy().into_owned();
+
+        let before = cache_stats();
+        resolve_git_info(&key);
+        resolve_git_info(&key);
+        let after = cache_stats();
+        // Other tests share the counters, so only lower bounds hold.
+        assert!(after.misses > before.misses);
+        assert!(after.hits > before.hits);
+    }
+
+    #[test]
+    fn disk_cache_round_trips_and_tracks_origin_changes() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("persisted");
+        make_repo(&root, "main", Some("git@github.com:owner/first.git"));
+        let cache_dir = tmp.path().join("data").join("git_info");
+        let key = root.to_string_lossy().into_owned();
+
+        let stable = resolve_stable(&root).unwrap();
+        assert!(disk_store(&cache_dir, &key, &stable));
+        assert!(!disk_store(&cache_dir, &key, &stable));
+
+        let hit = disk_lookup(&cache_dir, &key).unwrap();
+        assert_eq!(hit.repo_name, "first");
+        assert_eq!(
+            hit.with_current_branch().unwrap().branch.as_deref(),
+            Some("main")
+        );
+        assert!(disk_lookup(&cache_dir, "/some/other/path").is_none());
+
+        // Rewriting the config (new origin) changes its mtime or size.
+        std::thread::sleep(Duration::from_millis(20));
+        fs::write(
+            root.join(".git/config"),
+            "[remote \"origin\"]\n\turl = git@github.com:owner/renamed-repo.git\n",
+        )
+        .unwrap();
+        assert!(disk_lookup(&cache_dir, &key).is_none());
+    }
+
+    #[test]
+    fn disk_cache_misses_nested_repo_created_later() {
+        let tmp = tempfile::tempdir().unwrap();
+        let outer = tmp.path().join("outer");
+        make_repo(&outer, "main", None);
+        let inner = outer.join("vendor").join("inner");
+        fs::create_dir_all(&inner).unwrap();
+        let cache_dir = tmp.path().join("git_info");
+        let key = inner.to_string_lossy().into_owned();
+
+        disk_store(&cache_dir, &key, &resolve_stable(&inner).unwrap());
+        assert!(disk_lookup(&cache_dir, &key).is_some());
+
+        make_repo(&inner, "nested", None);
+        assert!(disk_lookup(&cache_dir, &key).is_none());
+        let info = resolve_persistent_in(&cache_dir, &inner).unwrap();
+        assert_eq!(info.branch.as_deref(), Some("nested"));
+    }
+
+    #[test]
+    fn disk_cache_expires_old_entries() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("aging");
+        make_repo(&root, "main", None);
+        let cache_dir = tmp.path().join("git_info");
+        let key = root.to_string_lossy().into_owned();
+        disk_store(&cache_dir, &key, &resolve_stable(&root).unwrap());
+
+        let path = disk_entry_path(&cache_dir, &key);
+        let mut entry: DiskEntry = serde_json::from_slice(&fs::read(&path).unwrap()).unwrap();
+        entry.resolved_at -= DISK_CACHE_TTL.as_secs();
+        fs::write(&path, serde_json::to_vec(&entry).unwrap()).unwrap();
+        assert!(disk_lookup(&cache_dir, &key).is_none());
+    }
+
+    #[test]
+    fn disk_cache_prunes_oldest_entries() {
+        let tmp = tempfile::tempdir().unwrap();
+        let cache_dir = tmp.path().join("git_info");
+        fs::create_dir_all(&cache_dir).unwrap();
+        for i in 0..DISK_CACHE_MAX_ENTRIES + 3 {
+            fs::write(cache_dir.join(format!("{:016x}.json", i)), "{}").unwrap();
+        }
+        prune_disk_cache(&cache_dir);
+        assert_eq!(
+            fs::read_dir(&cache_dir).unwrap().count(),
+            DISK_CACHE_MAX_ENTRIES
+        );
+    }
+
+    #[test]
+    fn persistent_resolver_matches_uncached() {
+        let tmp = tempfile::tempdir().unwrap();
+        let root = tmp.path().join("hooked");
+        make_repo(&root, "main", Some("https://github.com/owner/hooked.git"));
+        let cache_dir = tmp.path().join("git_info");
+
+        for _ in 0..2 {
+            let info = resolve_persistent_in(&cache_dir, &root).unwrap();
+            assert_eq!(info.repo_name, "hooked");
+            assert_eq!(info.branch.as_deref(), Some("main"));
+            flush_persistent_cache();
+        }
+        assert!(disk_entry_path(&cache_dir, &root.to_string_lossy()).exists());
+        fs::write(root.join(".git/HEAD"), "ref: refs/heads/next\n").unwrap();
+        let info = resolve_persistent_in(&cache_dir, &root).unwrap();
+        assert_eq!(info.branch.as_deref(), Some("next"));
+    }
+
     #[test]
     fn parses_origin_url_variants() {
         assert_eq!(
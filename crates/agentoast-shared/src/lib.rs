@@ -1,7 +1,10 @@
 pub mod agent_detect;
 pub mod config;
+pub mod config_snapshot;
 pub mod db;
 pub mod git_info;
 pub mod models;
+pub mod retention;
 pub mod schema;
 pub mod tmux;
+pub mod wake;
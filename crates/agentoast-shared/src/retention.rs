@@ -0,0 +1,222 @@
+//! Background compaction of notification history.
+//!
+//! `insert_notification` only replaces rows from the same tmux pane, so
+//! anything sent without a pane (`agentoast send` from scripts/CI) used to
+//! accumulate forever, along with the WAL and free pages behind it. The app
+//! runs `compact` periodically with the `[notification.retention]` limits:
+//! old / surplus rows go in small batches (short write locks, so hooks never
+//! wait on us), the WAL is truncated, and free pages are returned to the
+//! filesystem once enough of them pile up.
+
+use std::time::Duration;
+
+use rusqlite::Connection;
+
+use crate::config::RetentionConfig;
+use crate::db;
+
+/// How often the app runs `compact`.
+pub const COMPACTION_INTERVAL: Duration = Duration::from_secs(15 * 60);
+
+/// Rows deleted per write transaction.
+const DELETE_BATCH: usize = 200;
+
+/// Free pages tolerated before an incremental vacuum (1 MiB at 4 KiB pages).
+const VACUUM_FREE_PAGES: i64 = 256;
+
+/// `PRAGMA auto_vacuum` value for INCREMENTAL.
+const AUTO_VACUUM_INCREMENTAL: i64 = 2;
+
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct CompactionStats {
+    pub expired: usize,
+    pub over_limit: usize,
+    pub vacuumed: bool,
+}
+
+/// Apply `config` to the database behind `conn`, then checkpoint and (if
+/// worthwhile) vacuum.
+pub fn compact(conn: &Connection, config: &RetentionConfig) -> rusqlite::Result<CompactionStats> {
+    let mut stats = CompactionStats::default();
+
+    if config.max_age_days > 0 {
+        stats.expired = delete_in_batches(|| {
+            db::delete_expired_batch(conn, config.max_age_days, DELETE_BATCH)
+        })?;
+    }
+    if config.max_rows_per_repo > 0 {
+        // Cutoffs are taken once: rows inserted meanwhile have higher ids,
+        // so they are never mistaken for surplus.
+        for (repo, cutoff_id) in db::repo_limit_cutoffs(conn, config.max_rows_per_repo)? {
+            stats.over_limit += delete_in_batches(|| {
+                db::delete_repo_before_batch(conn, &repo, cutoff_id, DELETE_BATCH)
+            })?;
+        }
+    }
+
+    stats.vacuumed = vacuum_if_fragmented(conn)?;
+    checkpoint_truncate(conn)?;
+    Ok(stats)
+}
+
+fn delete_in_batches(
+    mut delete_batch: impl FnMut() -> rusqlite::Result<usize>,
+) -> rusqlite::Result<usize> {
+    let mut total = 0;
+    loop {
+        let n = delete_batch()?;
+        total += n;
+        if n < DELETE_BATCH {
+            return Ok(total);
+        }
+    }
+}
+
+/// Reclaim free pages once there are enough to matter. New databases start
+/// with `auto_vacuum = INCREMENTAL` (see `schema::initialize`); ones created
+/// before that have `NONE`, which can only be switched by a full VACUUM.
+/// That happens once, after which incremental vacuums are cheap.
+fn vacuum_if_fragmented(conn: &Connection) -> rusqlite::Result<bool> {
+    let free_pages: i64 = conn.pragma_query_value(None, "freelist_count", |row| row.get(0))?;
+    if free_pages < VACUUM_FREE_PAGES {
+        return Ok(false);
+    }
+
+    let auto_vacuum: i64 = conn.pragma_query_value(None, "auto_vacuum", |row| row.get(0))?;
+    if auto_vacuum == AUTO_VACUUM_INCREMENTAL {
+        // Each step frees one page and yields a row; step until it is done.
+        let mut stmt = conn.prepare("PRAGMA incremental_vacuum")?;
+        let mut rows = stmt.query([])?;
+        while rows.next()?.is_some() {}
+    } else {
+        conn.pragma_update(None, "auto_vacuum", "INCREMENTAL")?;
+        conn.execute_batch("VACUUM")?;
+    }
+    Ok(true)
+}
+
+/// Fold the WAL back into the main file and truncate it to zero bytes. A
+/// busy checkpoint (a reader still pinned on an old snapshot) is not an
+/// error; the next run picks it up.
+fn checkpoint_truncate(conn: &Connection) -> rusqlite::Result<()> {
+    let busy: i64 = conn.query_row("PRAGMA wal_checkpoint(TRUNCATE)", [], |row| row.get(0))?;
+    if busy != 0 {
+        log::debug!("retention: WAL checkpoint incomplete (readers active)");
+    }
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn open_temp() -> (tempfile::TempDir, Connection) {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = db::open(&tmp.path().join("notifications.db")).unwrap();
+        (tmp, conn)
+    }
+
+    fn count(conn: &Connection) -> i64 {
+        conn.query_row("SELECT COUNT(*) FROM notifications", [], |row| row.get(0))
+            .unwrap()
+    }
+
+    #[test]
+    fn expired_rows_are_deleted() {
+        let (_tmp, conn) = open_temp();
+        conn.execute_batch(
+            "INSERT INTO notifications (repo) VALUES ('a');
+             INSERT INTO notifications (repo, created_at)
+             VALUES ('a', strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-40 days'));",
+        )
+        .unwrap();
+
+        let config = RetentionConfig {
+            max_rows_per_repo: 0,
+            max_age_days: 30,
+        };
+        let stats = compact(&conn, &config).unwrap();
+        assert_eq!(stats.expired, 1);
+        assert_eq!(count(&conn), 1);
+    }
+
+    #[test]
+    fn per_repo_limit_keeps_newest_rows() {
+        let (_tmp, conn) = open_temp();
+        for i in 0..(DELETE_BATCH + 10) {
+            let repo = if i % 2 == 0 { "a" } else { "b" };
+            conn.execute("INSERT INTO notifications (repo) VALUES (?1)", [repo])
+                .unwrap();
+        }
+        let newest_a: i64 = conn
+            .query_row(
+                "SELECT MAX(id) FROM notifications WHERE repo = 'a'",
+                [],
+                |row| row.get(0),
+            )
+            .unwrap();
+
+        let config = RetentionConfig {
+            max_rows_per_repo: 3,
+            max_age_days: 0,
+        };
+        let stats = compact(&conn, &config).unwrap();
+        assert_eq!(stats.over_limit, DELETE_BATCH + 10 - 6);
+        assert_eq!(count(&conn), 6);
+        let kept_newest: i64 = conn
+            .query_row(
+                "SELECT COUNT(*) FROM notifications WHERE id = ?1",
+                [newest_a],
+                |row| row.get(0),
+            )
+            .unwrap();
+        assert_eq!(kept_newest, 1);
+        assert_eq!(db::get_unread_count(&conn).unwrap(), 6);
+    }
+
+    #[test]
+    fn compaction_reclaims_free_pages() {
+        let (_tmp, conn) = open_temp();
+        let body = "x".repeat(2000);
+        for _ in 0..1000 {
+            conn.execute(
+                "INSERT INTO notifications (repo, body, created_at)
+                 VALUES ('a', ?1, strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-40 days'))",
+                [&body],
+            )
+            .unwrap();
+        }
+
+        let config = RetentionConfig {
+            max_rows_per_repo: 0,
+            max_age_days: 30,
+        };
+        let stats = compact(&conn, &config).unwrap();
+        assert_eq!(stats.expired, 1000);
+        assert!(stats.vacuumed);
+        let free_pages: i64 = conn
+            .pragma_query_value(None, "freelist_count", |row| row.get(0))
+            .unwrap();
+        assert!(
+            free_pages < VACUUM_FREE_PAGES,
+            "{free_pages} free pages left"
+        );
+    }
+
+    #[test]
+    fn zero_limits_keep_everything() {
+        let (_tmp, conn) = open_temp();
+        conn.execute_batch(
+            "INSERT INTO notifications (repo, created_at)
+             VALUES ('a', strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-400 days'));",
+        )
+        .unwrap();
+
+        let config = RetentionConfig {
+            max_rows_per_repo: 0,
+            max_age_days: 0,
+        };
+        assert_eq!(compact(&conn, &config).unwrap(), CompactionStats::default());
+        assert_eq!(count(&conn), 1);
+    }
+}
@@ -1,29 +1,429 @@
-use rusqlite::Connection;
+//! Versioned schema migrations tracked with `PRAGMA user_version`.
+//!
+//! `initialize` runs on every `db::open` (app startup, watcher startup). It
+//! used to drop and recreate the notifications table each time, wiping
+//! history and paying for DDL + index creation on a path that should be
+//! free. Now an up-to-date database costs one pragma read; migrations only
+//! run when `user_version` is behind `MIGRATIONS`.
+//!
+//! To change the schema, append a migration — never edit one that has
+//! shipped.
+
+use rusqlite::{Connection, Transaction, TransactionBehavior};
+
+/// Ordered schema migrations. Migration `i` moves the database from
+/// `user_version = i` to `user_version = i + 1`.
+const MIGRATIONS: &[&str] = &[
+    // 1: notifications table. Databases created before versioning
+    // (user_version = 0) were recreated on every startup anyway, so the
+    // baseline drops any legacy table one last time to guarantee the layout.
+    "
+    DROP TABLE IF EXISTS notifications;
+
+    CREATE TABLE notifications (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        badge         TEXT NOT NULL DEFAULT '',
+        body          TEXT NOT NULL DEFAULT '',
+        badge_color   TEXT NOT NULL DEFAULT 'gray',
+        icon          TEXT NOT NULL DEFAULT 'agentoast',
+        metadata      TEXT NOT NULL DEFAULT '{}',
+        repo          TEXT NOT NULL DEFAULT '',
+        tmux_pane     TEXT NOT NULL DEFAULT '',
+        terminal_bundle_id TEXT NOT NULL DEFAULT '',
+        force_focus   INTEGER NOT NULL DEFAULT 0,
+        is_read       INTEGER NOT NULL DEFAULT 0,
+        created_at    TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications(created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_notifications_tmux_pane ON notifications(tmux_pane);
+    ",
+    // 2: trigger-maintained unread counter, so `db::get_unread_count` is a
+    // single-row read instead of a full scan (there is no index on is_read).
+    "
+    CREATE TABLE notification_counts (
+        id      INTEGER PRIMARY KEY CHECK (id = 1),
+        unread  INTEGER NOT NULL
+    );
+
+    INSERT INTO notification_counts (id, unread)
+    SELECT 1, COUNT(*) FROM notifications WHERE is_read = 0;
+
+    CREATE TRIGGER notifications_unread_insert AFTER INSERT ON notifications
+    WHEN NEW.is_read = 0
+    BEGIN
+        UPDATE notification_counts SET unread = unread + 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER notifications_unread_delete AFTER DELETE ON notifications
+    WHEN OLD.is_read = 0
+    BEGIN
+        UPDATE notification_counts SET unread = unread - 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER notifications_unread_update AFTER UPDATE OF is_read ON notifications
+    WHEN (OLD.is_read = 0) != (NEW.is_read = 0)
+    BEGIN
+        UPDATE notification_counts
+        SET unread = unread + (NEW.is_read = 0) - (OLD.is_read = 0)
+        WHERE id = 1;
+    END;
+    ",
+    // 3: FTS5 index over the searchable text (see `db::search_notifications`).
+    // rowid mirrors notifications.id; `branch` is lifted out of the metadata
+    // JSON. Triggers keep it in sync, including the retention deletes.
+    "
+    CREATE VIRTUAL TABLE notifications_fts USING fts5(body, badge, repo, branch);
+
+    INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+    SELECT id, body, badge, repo,
+           CASE WHEN json_valid(metadata)
+                THEN COALESCE(json_extract(metadata, '$.branch'), '') ELSE '' END
+    FROM notifications;
+
+    CREATE TRIGGER notifications_fts_insert AFTER INSERT ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo,
+                CASE WHEN json_valid(NEW.metadata)
+                     THEN COALESCE(json_extract(NEW.metadata, '$.branch'), '') ELSE '' END);
+    END;
+
+    CREATE TRIGGER notifications_fts_delete AFTER DELETE ON notifications
+    BEGIN
+        DELETE FROM notifications_fts WHERE rowid = OLD.id;
+    END;
+
+    CREATE TRIGGER notifications_fts_update
+    AFTER UPDATE OF body, badge, repo, metadata ON notifications
+    BEGIN
+        DELETE FROM notifications_fts WHERE rowid = OLD.id;
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo,
+                CASE WHEN json_valid(NEW.metadata)
+                     THEN COALESCE(json_extract(NEW.metadata, '$.branch'), '') ELSE '' END);
+    END;
+    ",
+    // 4: promote the metadata keys hooks actually set to real columns, so
+    // reads skip the per-row JSON parse and branch filters can use an index.
+    // `metadata` keeps only the remaining arbitrary `--meta` pairs. The FTS
+    // triggers are recreated first so the backfill (which rewrites metadata)
+    // doesn't blank the indexed branch.
+    "
+    ALTER TABLE notifications ADD COLUMN branch   TEXT NOT NULL DEFAULT '';
+    ALTER TABLE notifications ADD COLUMN teammate TEXT NOT NULL DEFAULT '';
+    ALTER TABLE notifications ADD COLUMN team     TEXT NOT NULL DEFAULT '';
+    ALTER TABLE notifications ADD COLUMN task     TEXT NOT NULL DEFAULT '';
+
+    DROP TRIGGER notifications_fts_insert;
+    DROP TRIGGER notifications_fts_update;
+
+    UPDATE notifications SET
+        branch   = COALESCE(json_extract(metadata, '$.branch'), ''),
+        teammate = COALESCE(json_extract(metadata, '$.teammate'), ''),
+        team     = COALESCE(json_extract(metadata, '$.team'), ''),
+        task     = COALESCE(json_extract(metadata, '$.task'), ''),
+        metadata = json_remove(metadata, '$.branch', '$.teammate', '$.team', '$.task')
+    WHERE json_valid(metadata);
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_branch ON notifications(branch);
+
+    CREATE TRIGGER notifications_fts_insert AFTER INSERT ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo, NEW.branch);
+    END;
+
+    CREATE TRIGGER notifications_fts_update
+    AFTER UPDATE OF body, badge, repo, branch ON notifications
+    BEGIN
+        DELETE FROM notifications_fts WHERE rowid = OLD.id;
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo, NEW.branch);
+    END;
+    ",
+    // 5: per-repo retention deletes `repo = ? AND id < ?` in batches.
+    "
+    CREATE INDEX IF NOT EXISTS idx_notifications_repo_id ON notifications(repo, id);
+    ",
+    // 6: the panel pages by (created_at DESC, id DESC). The single-column
+    // index left the id tie-break to a temp B-tree sort; this one covers
+    // both keys, so a page is a plain backwards index scan.
+    "
+    DROP INDEX IF EXISTS idx_notifications_created_at;
+    CREATE INDEX IF NOT EXISTS idx_notifications_created_at_id ON notifications(created_at, id);
+    ",
+    // 7: the promoted metadata columns become nullable: NULL is an absent key,
+    // '' a key set to an empty value (migration 4's NOT NULL '' default could
+    // not tell them apart, so reads dropped empty values). Existing '' values
+    // become NULL, which is what reads already reported for them. SQLite
+    // cannot relax NOT NULL in place, so the columns are re-added; the branch
+    // index and FTS triggers that reference them are recreated around that.
+    "
+    DROP TRIGGER notifications_fts_insert;
+    DROP TRIGGER notifications_fts_update;
+    DROP INDEX idx_notifications_branch;
+
+    ALTER TABLE notifications RENAME COLUMN branch   TO branch_v4;
+    ALTER TABLE notifications RENAME COLUMN teammate TO teammate_v4;
+    ALTER TABLE notifications RENAME COLUMN team     TO team_v4;
+    ALTER TABLE notifications RENAME COLUMN task     TO task_v4;
+
+    ALTER TABLE notifications ADD COLUMN branch   TEXT;
+    ALTER TABLE notifications ADD COLUMN teammate TEXT;
+    ALTER TABLE notifications ADD COLUMN team     TEXT;
+    ALTER TABLE notifications ADD COLUMN task     TEXT;
+
+    UPDATE notifications SET
+        branch   = NULLIF(branch_v4, ''),
+        teammate = NULLIF(teammate_v4, ''),
+        team     = NULLIF(team_v4, ''),
+        task     = NULLIF(task_v4, '');
+
+    ALTER TABLE notifications DROP COLUMN branch_v4;
+    ALTER TABLE notifications DROP COLUMN teammate_v4;
+    ALTER TABLE notifications DROP COLUMN team_v4;
+    ALTER TABLE notifications DROP COLUMN task_v4;
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_branch ON notifications(branch);
+
+    CREATE TRIGGER notifications_fts_insert AFTER INSERT ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo, COALESCE(NEW.branch, ''));
+    END;
+
+    CREATE TRIGGER notifications_fts_update
+    AFTER UPDATE OF body, badge, repo, branch ON notifications
+    BEGIN
+        DELETE FROM notifications_fts WHERE rowid = OLD.id;
+        INSERT INTO notifications_fts (rowid, body, badge, repo, branch)
+        VALUES (NEW.id, NEW.body, NEW.badge, NEW.repo, COALESCE(NEW.branch, ''));
+    END;
+    ",
+];
+
+/// Switch a brand-new database to `auto_vacuum = INCREMENTAL`, so retention
+/// never needs its one-off full VACUUM on it. The mode can't be set inside
+/// the migration transaction, and once `db::open` has enabled WAL it only
+/// takes effect through a VACUUM — instant while the file is still empty.
+/// Skipped when tables already exist (a legacy pre-versioning database:
+/// retention converts it later). Best effort: a concurrent opener holding
+/// the database just means this one stays `NONE`.
+fn enable_incremental_vacuum(conn: &Connection) {
+    let result = conn
+        .query_row("SELECT COUNT(*) FROM sqlite_master", [], |row| {
+            row.get::<_, i64>(0)
+        })
+        .and_then(|objects| {
+            if objects == 0 {
+                conn.pragma_update(None, "auto_vacuum", "INCREMENTAL")?;
+                conn.execute_batch("VACUUM")?;
+            }
+            Ok(())
+        });
+    if let Err(e) = result {
+        log::debug!("Could not enable incremental auto_vacuum: {}", e);
+    }
+}
+
+/// Schema version a fully migrated database reports via `PRAGMA user_version`.
+pub const SCHEMA_VERSION: i64 = MIGRATIONS.len() as i64;
+
+fn user_version(conn: &Connection) -> rusqlite::Result<i64> {
+    conn.pragma_query_value(None, "user_version", |row| row.get(0))
+}
 
 pub fn initialize(conn: &Connection) -> rusqlite::Result<()> {
-    conn.execute_batch(
-        "
-        DROP TABLE IF EXISTS notifications;
-
-        CREATE TABLE notifications (
-            id            INTEGER PRIMARY KEY AUTOINCREMENT,
-            badge         TEXT NOT NULL DEFAULT '',
-            body          TEXT NOT NULL DEFAULT '',
-            badge_color   TEXT NOT NULL DEFAULT 'gray',
-            icon          TEXT NOT NULL DEFAULT 'agentoast',
-            metadata      TEXT NOT NULL DEFAULT '{}',
-            repo          TEXT NOT NULL DEFAULT '',
-            tmux_pane     TEXT NOT NULL DEFAULT '',
-            terminal_bundle_id TEXT NOT NULL DEFAULT '',
-            force_focus   INTEGER NOT NULL DEFAULT 0,
-            is_read       INTEGER NOT NULL DEFAULT 0,
-            created_at    TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications(created_at DESC);
-        CREATE INDEX IF NOT EXISTS idx_notifications_tmux_pane ON notifications(tmux_pane);
-        ",
-    )?;
-
-    Ok(())
+    // Fast path: already current (the common case on every restart).
+    let version = user_version(conn)?;
+    if version >= SCHEMA_VERSION {
+        return Ok(());
+    }
+
+    if version == 0 {
+        enable_incremental_vacuum(conn);
+    }
+
+    // Take the write lock up front and re-check, so concurrent openers (app +
+    // CLI) don't both run the same migration.
+    let tx = Transaction::new_unchecked(conn, TransactionBehavior::Immediate)?;
+    let current = user_version(&tx)?;
+    if current >= SCHEMA_VERSION {
+        return Ok(());
+    }
+
+    for (i, migration) in MIGRATIONS.iter().enumerate().skip(current as usize) {
+        log::info!("Applying schema migration {}", i + 1);
+        tx.execute_batch(migration)?;
+    }
+    tx.pragma_update(None, "user_version", SCHEMA_VERSION)?;
+    tx.commit()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn fresh_database_is_migrated_to_latest() {
+        let conn = Connection::open_in_memory().unwrap();
+        initialize(&conn).unwrap();
+        assert_eq!(user_version(&conn).unwrap(), SCHEMA_VERSION);
+    }
+
+    #[test]
+    fn fresh_database_uses_incremental_auto_vacuum() {
+        let tmp = tempfile::tempdir().unwrap();
+        let conn = crate::db::open(&tmp.path().join("notifications.db")).unwrap();
+        let auto_vacuum: i64 = conn
+            .pragma_query_value(None, "auto_vacuum", |row| row.get(0))
+            .unwrap();
+        assert_eq!(auto_vacuum, 2);
+        let journal_mode: String = conn
+            .pragma_query_value(None, "journal_mode", |row| row.get(0))
+            .unwrap();
+        assert_eq!(journal_mode, "wal");
+    }
+
+    #[test]
+    fn reinitialize_keeps_existing_rows() {
+        let tmp = tempfile::tempdir().unwrap();
+        let path = tmp.path().join("notifications.db");
+
+        let conn = Connection::open(&path).unwrap();
+        initialize(&conn).unwrap();
+        conn.execute("INSERT INTO notifications (badge) VALUES ('Stop')", [])
+            .unwrap();
+        drop(conn);
+
+        let conn = Connection::open(&path).unwrap();
+        initialize(&conn).unwrap();
+        let count: i64 = conn
+            .query_row("SELECT COUNT(*) FROM notifications", [], |row| row.get(0))
+            .unwrap();
+        assert_eq!(count, 1);
+    }
+
+    #[test]
+    fn unread_counter_tracks_inserts_updates_and_deletes() {
+        let conn = Connection::open_in_memory().unwrap();
+        initialize(&conn).unwrap();
+        let counter = |conn: &Connection| -> i64 {
+            conn.query_row("SELECT unread FROM notification_counts", [], |row| {
+                row.get(0)
+            })
+            .unwrap()
+        };
+
+        conn.execute_batch(
+            "INSERT INTO notifications (badge) VALUES ('a'), ('b'), ('c');
+             INSERT INTO notifications (badge, is_read) VALUES ('d', 1);",
+        )
+        .unwrap();
+        assert_eq!(counter(&conn), 3);
+
+        conn.execute("UPDATE notifications SET is_read = 1 WHERE badge = 'a'", [])
+            .unwrap();
+        conn.execute("UPDATE notifications SET is_read = 0 WHERE badge = 'd'", [])
+            .unwrap();
+        conn.execute("DELETE FROM notifications WHERE badge = 'b'", [])
+            .unwrap();
+        assert_eq!(counter(&conn), 2);
+
+        conn.execute("DELETE FROM notifications", []).unwrap();
+        assert_eq!(counter(&conn), 0);
+    }
+
+    #[test]
+    fn unread_counter_is_seeded_from_existing_rows() {
+        let conn = Connection::open_in_memory().unwrap();
+        conn.execute_batch(MIGRATIONS[0]).unwrap();
+        conn.pragma_update(None, "user_version", 1).unwrap();
+        conn.execute_batch("INSERT INTO notifications (badge) VALUES ('a'), ('b');")
+            .unwrap();
+
+        initialize(&conn).unwrap();
+        let unread: i64 = conn
+            .query_row("SELECT unread FROM notification_counts", [], |row| {
+                row.get(0)
+            })
+            .unwrap();
+        assert_eq!(unread, 2);
+    }
+
+    #[test]
+    fn fts_index_follows_inserts_updates_and_deletes() {
+        let conn = Connection::open_in_memory().unwrap();
+        initialize(&conn).unwrap();
+        let hits = |conn: &Connection, query: &str| -> i64 {
+            conn.query_row(
+                "SELECT COUNT(*) FROM notifications_fts WHERE notifications_fts MATCH ?1",
+                [query],
+                |row| row.get(0),
+            )
+            .unwrap()
+        };
+
+        conn.execute(
+            "INSERT INTO notifications (body, branch) VALUES ('build finished', 'feature-x')",
+            [],
+        )
+        .unwrap();
+        assert_eq!(hits(&conn, "finished"), 1);
+        assert_eq!(hits(&conn, "branch:feature"), 1);
+
+        conn.execute("UPDATE notifications SET body = 'tests failed'", [])
+            .unwrap();
+        assert_eq!(hits(&conn, "finished"), 0);
+        assert_eq!(hits(&conn, "failed"), 1);
+
+        conn.execute("DELETE FROM notifications", []).unwrap();
+        assert_eq!(hits(&conn, "failed"), 0);
+    }
+
+    #[test]
+    fn metadata_keys_are_promoted_to_columns() {
+        let conn = Connection::open_in_memory().unwrap();
+        for migration in &MIGRATIONS[..3] {
+            conn.execute_batch(migration).unwrap();
+        }
+        conn.pragma_update(None, "user_version", 3).unwrap();
+        conn.execute(
+            "INSERT INTO notifications (metadata) VALUES ('{\"branch\":\"main\",\"team\":\"core\",\"pr\":\"12\"}')",
+            [],
+        )
+        .unwrap();
+
+        initialize(&conn).unwrap();
+        let (branch, team, metadata): (String, String, String) = conn
+            .query_row(
+                "SELECT branch, team, metadata FROM notifications",
+                [],
+                |row| Ok((row.get(0)?, row.get(1)?, row.get(2)?)),
+            )
+            .unwrap();
+        assert_eq!(branch, "main");
+        assert_eq!(team, "core");
+        assert_eq!(metadata, "{\"pr\":\"12\"}");
+        let fts_hits: i64 = conn
+            .query_row(
+                "SELECT COUNT(*) FROM notifications_fts WHERE notifications_fts MATCH 'branch:main'",
+                [],
+                |row| row.get(0),
+            )
+            .unwrap();
+        assert_eq!(fts_hits, 1);
+    }
+
+    #[test]
+    fn legacy_table_without_version_is_replaced() {
+        let conn = Connection::open_in_memory().unwrap();
+        conn.execute_batch("CREATE TABLE notifications (id INTEGER PRIMARY KEY, legacy TEXT);")
+            .unwrap();
+        initialize(&conn).unwrap();
+        // The baseline layout has `tmux_pane`; the legacy table did not.
+        conn.execute("INSERT INTO notifications (tmux_pane) VALUES ('%1')", [])
+            .unwrap();
+    }
 }
@@ -0,0 +1,96 @@
+//! Local datagram socket the CLI uses to wake the running app.
+//!
+//! Without it the app only learns about a hook's INSERT through the
+//! filesystem watcher (plus a short debounce) or the polling fallback. After
+//! committing, the CLI sends a tiny `new <id>` datagram to
+//! `config::wake_socket_path()`; the app's listener runs its notification
+//! check immediately. The channel is purely an accelerator: the database
+//! stays the source of truth, and when the app is not running (no socket, or
+//! a stale socket file nobody is bound to) the send fails and is ignored.
+
+use std::io;
+use std::os::unix::net::UnixDatagram;
+use std::path::Path;
+
+const MESSAGE_PREFIX: &str = "new ";
+
+/// Tell a listening app that notification `id` was committed. Best effort and
+/// silent: any failure (app not running, socket buffer full) is ignored.
+pub fn send_new(socket_path: &Path, id: i64) {
+    let Ok(sock) = UnixDatagram::unbound() else {
+        return;
+    };
+    // Never block a hook on a slow or wedged receiver.
+    if sock.set_nonblocking(true).is_err() {
+        return;
+    }
+    let msg = format!("{}{}", MESSAGE_PREFIX, id);
+    if let Err(e) = sock.send_to(msg.as_bytes(), socket_path) {
+        log::debug!("wake: no listener at {}: {}", socket_path.display(), e);
+    }
+}
+
+/// Bind the app-side listener, replacing a stale socket file left behind by
+/// a previous run.
+pub fn bind(socket_path: &Path) -> io::Result<UnixDatagram> {
+    if let Some(parent) = socket_path.parent() {
+        std::fs::create_dir_all(parent).ok();
+    }
+    match std::fs::remove_file(socket_path) {
+        Ok(()) => {}
+        Err(e) if e.kind() == io::ErrorKind::NotFound => {}
+        Err(e) => return Err(e),
+    }
+    UnixDatagram::bind(socket_path)
+}
+
+/// Parse a `new <id>` datagram. Returns `None` for anything else.
+pub fn parse(msg: &[u8]) -> Option<i64> {
+    std::str::from_utf8(msg)
+        .ok()?
+        .strip_prefix(MESSAGE_PREFIX)?
+        .trim()
+        .parse()
+        .ok()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn round_trip_delivers_id() {
+        let tmp = tempfile::tempdir().unwrap();
+        let path = tmp.path().join("wake.sock");
+        let listener = bind(&path).unwrap();
+
+        send_new(&path, 42);
+
+        let mut buf = [0u8; 64];
+        let n = listener.recv(&mut buf).unwrap();
+        assert_eq!(parse(&buf[..n]), Some(42));
+    }
+
+    #[test]
+    fn send_without_listener_is_silent() {
+        let tmp = tempfile::tempdir().unwrap();
+        send_new(&tmp.path().join("missing.sock"), 1);
+    }
+
+    #[test]
+    fn bind_replaces_stale_socket() {
+        let tmp = tempfile::tempdir().unwrap();
+        let path = tmp.path().join("wake.sock");
+        drop(bind(&path).unwrap());
+        assert!(path.exists());
+        bind(&path).unwrap();
+    }
+
+    #[test]
+    fn parse_rejects_garbage() {
+        assert_eq!(parse(b"new 7"), Some(7));
+        assert_eq!(parse(b"old 7"), None);
+        assert_eq!(parse(b"new x"), None);
+        assert_eq!(parse(&[0xff, 0xfe]), None);
+    }
+}
@@ -2,21 +2,47 @@
 """Icon generation script.
 
 Rasterizes agentoast.svg with cairosvg and generates PNGs, icon.icns,
-and tray icons at various sizes.
+and tray icons at various sizes. Independent outputs are rendered in
+parallel worker processes (see --jobs).
 
-Dependencies: pip install pillow cairosvg
+Only outputs whose sources or render parameters changed since the last run
+are re-rendered; hashes are tracked in icons-manifest.json. --check verifies
+the committed icons against that manifest without rasterizing anything.
+
+--atlas additionally packs the toast and meta icons into a single sprite
+sheet (toast/atlas.png) with an offset table (toast/atlas.json).
+
+--profile prints per-stage wall time and peak RSS growth for every job that runs;
+--profile-json PATH writes the raw records for CI regression tracking.
+
+--resample pyramid downsizes the app icon through a progressive mip pyramid
+instead of resizing every size from 1024px; --verify-resample reports the max
+per-pixel delta against direct resizing.
+
+Usage: python generate_icons.py [--jobs N] [--force] [--check] [--atlas [--atlas-scales 1,2,3]]
+                                [--profile] [--profile-json PATH]
+                                [--resample direct|pyramid] [--verify-resample]
+
+Dependencies: pip install pillow numpy cairosvg (--check needs only pillow and numpy)
 """
 
+import argparse
+import contextlib
+import functools
+import hashlib
 import io
+import json
 import os
-import shutil
-import subprocess
+import resource
+import struct
 import sys
-import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, Optional
 
-import cairosvg
 import numpy as np
-from PIL import Image, ImageDraw, ImageFilter
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageDraw
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -42,7 +68,14 @@ TOAST_ICON_SIZE = 40  # 20pt @2x Retina
 TOAST_META_ICONS = ["git-branch", "tmux", "x", "trash"]
 TOAST_META_ICON_SIZE = 20  # 10pt @2x Retina
 
-# Sizes and filenames required by iconutil
+# Toast sprite atlas (--atlas): every toast + meta icon at each scale in one PNG,
+# with a JSON offset table. Sizes are TOAST_*_ICON_SIZE (@2x) scaled by scale / 2.
+ATLAS_PNG_PATH = os.path.join(TOAST_DIR, "atlas.png")
+ATLAS_JSON_PATH = os.path.join(TOAST_DIR, "atlas.json")
+ATLAS_DEFAULT_SCALES = (2,)
+ATLAS_PADDING = 2  # Transparent gap between sprites (avoids bleeding when sampling)
+
+# Iconset entries (iconutil naming) and their sizes
 ICONSET_SIZES = {
     "icon_16x16.png": 16,
     "icon_16x16@2x.png": 32,
@@ -56,6 +89,22 @@ ICONSET_SIZES = {
     "icon_512x512@2x.png": 1024,
 }
 
+# ICNS element type for each iconset entry. Same types as iconutil: PNG data,
+# except 16px and 32px, which are stored as RLE-compressed ARGB (ICNS_ARGB_TYPES).
+ICNS_TYPES = {
+    "icon_16x16.png": b"ic04",
+    "icon_16x16@2x.png": b"ic11",
+    "icon_32x32.png": b"ic05",
+    "icon_32x32@2x.png": b"ic12",
+    "icon_128x128.png": b"ic07",
+    "icon_128x128@2x.png": b"ic13",
+    "icon_256x256.png": b"ic08",
+    "icon_256x256@2x.png": b"ic14",
+    "icon_512x512.png": b"ic09",
+    "icon_512x512@2x.png": b"ic10",
+}
+ICNS_ARGB_TYPES = frozenset({b"ic04", b"ic05"})
+
 # Colors
 APP_ICON_BG_COLOR = "#5C3A1E"  # Dark brown (burnt toast)
 NOTIFICATION_DOT_COLOR = "#FF9500"
@@ -66,21 +115,136 @@ TRAY_SIZE = 44
 # Threshold for white background detection (pixels with all RGB channels >= this are considered white)
 WHITE_THRESHOLD = 250
 
+# App icon downscaling: "direct" LANCZOS from the 1024px master for every size, or
+# "pyramid" (halve progressively and resize each size from the nearest mip level).
+RESAMPLE_MODES = ("direct", "pyramid")
+DEFAULT_RESAMPLE = "direct"
+
+# Max per-channel delta (premultiplied, 0-255) allowed between pyramid and direct
+# output (--verify-resample). Differences concentrate on anti-aliased edges.
+RESAMPLE_MAX_DELTA = 16
+
+# Incremental build manifest (source/output hashes + render parameters)
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, "icons-manifest.json")
+
+# Bump when the rendering code changes in a way that alters output pixels,
+# so every output is treated as stale on the next run.
+PIPELINE_VERSION = 3
+
+
+# Profiling (--profile): per-stage wall time + peak RSS growth, tagged with
+# the job being run. Disabled (None) unless profiling is requested.
+_PROFILE_RECORDS: Optional[list[dict]] = None
+_PROFILE_JOB = ""
+
+# Resample mode for the current process (set per job, since workers do not see CLI args)
+_RESAMPLE = DEFAULT_RESAMPLE
+
+
+def _max_rss_bytes() -> int:
+    """Peak resident set size of this process so far (ru_maxrss: bytes on macOS, KiB on Linux)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@contextlib.contextmanager
+def _stage(name: str):
+    """Record wall time and peak RSS growth of the enclosed block.
+
+    Memory is how far the block raised the process's peak RSS, so cairo and
+    Pillow's C buffers count along with Python objects, at no cost to the
+    timings. It is a high-water mark: a stage that stays below a peak set
+    earlier in the same worker records 0, and an outer stage includes the
+    growth of its inner stages. Each record also carries the worker's pid and
+    absolute peak RSS for per-worker totals.
+    """
+    if _PROFILE_RECORDS is None:
+        yield
+        return
+
+    rss_before = _max_rss_bytes()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        max_rss = _max_rss_bytes()
+        _PROFILE_RECORDS.append(
+            {
+                "job": _PROFILE_JOB,
+                "stage": name,
+                "seconds": elapsed,
+                "rss_growth_bytes": max_rss - rss_before,
+                "max_rss_bytes": max_rss,
+                "pid": os.getpid(),
+            }
+        )
+
+
+def _profiled(func):
+    """Decorator: record every call of `func` as a profiling stage named after it."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _stage(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# Render cache: (SVG content hash, size, pipeline stage) -> bitmap.
+# Each master bitmap is built once per run and every output size is derived from it.
+_RENDER_CACHE: dict[tuple[str, int, str], Image.Image] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _read_svg(path: str) -> bytes:
+    """Read an SVG source file (once per run)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _cached_render(stage: str, svg_bytes: bytes, size: int, build) -> Image.Image:
+    """Return the cached bitmap for (svg_bytes, size, stage), building it on first use.
+
+    A copy is returned so callers can draw on the result without touching the cache.
+    """
+    key = (hashlib.sha256(svg_bytes).hexdigest(), size, stage)
+    img = _RENDER_CACHE.get(key)
+    if img is None:
+        img = build()
+        _RENDER_CACHE[key] = img
+    return img.copy()
+
+
+@_profiled
+def _rasterize(svg_bytes: bytes, size: int) -> Image.Image:
+    """Rasterize SVG source bytes with cairosvg (uncached)."""
+    # Imported on first use so --check (hashes only) runs without the cairo
+    # system library.
+    import cairosvg
 
-def _rasterize_svg(size: int) -> Image.Image:
-    """Rasterize SVG to an RGBA PNG at the given size."""
     png_data = cairosvg.svg2png(
-        url=SVG_PATH,
+        bytestring=svg_bytes,
         output_width=size,
         output_height=size,
     )
     return Image.open(io.BytesIO(png_data)).convert("RGBA")
 
 
+def _rasterize_svg_bytes(svg_bytes: bytes, size: int) -> Image.Image:
+    """Rasterize SVG source bytes to an RGBA image at the given size."""
+    return _cached_render("rasterize", svg_bytes, size, lambda: _rasterize(svg_bytes, size))
+
+
+def _rasterize_svg(size: int) -> Image.Image:
+    """Rasterize SVG to an RGBA PNG at the given size."""
+    return _rasterize_svg_bytes(_read_svg(SVG_PATH), size)
+
+
 def _make_ghost_svg() -> str:
     """Extract the ghost (body + eyes) paths from the SVG and return as an SVG string."""
-    with open(SVG_PATH) as f:
-        lines = f.readlines()
+    lines = _read_svg(SVG_PATH).decode("utf-8").splitlines(keepends=True)
 
     parts = []
     parts.append(lines[0])        # SVG header
@@ -91,13 +255,7 @@ def _make_ghost_svg() -> str:
 
 def _rasterize_ghost_svg(size: int) -> Image.Image:
     """Rasterize the ghost-only SVG at the given size."""
-    ghost_svg = _make_ghost_svg()
-    png_data = cairosvg.svg2png(
-        bytestring=ghost_svg.encode("utf-8"),
-        output_width=size,
-        output_height=size,
-    )
-    return Image.open(io.BytesIO(png_data)).convert("RGBA")
+    return _rasterize_svg_bytes(_make_ghost_svg().encode("utf-8"), size)
 
 
 def _remove_white_background(img: Image.Image) -> Image.Image:
@@ -109,6 +267,7 @@ def _remove_white_background(img: Image.Image) -> Image.Image:
     return Image.fromarray(arr)
 
 
+@_profiled
 def _crop_and_pad(img: Image.Image, target_size: int, padding_ratio: float = 0.05) -> Image.Image:
     """Crop to content bounding box, square, add padding, and resize."""
     bbox = img.getbbox()
@@ -143,9 +302,13 @@ def _colorize_to_white(img: Image.Image) -> Image.Image:
 
 # --- Icon rendering ---
 
-def render_app_icon(size: int) -> Image.Image:
-    """App icon (toast-colored background + character + rounded corners)."""
-    canvas_size = 1024
+APP_ICON_CANVAS_SIZE = 1024
+
+
+@_profiled
+def _render_app_icon_master() -> Image.Image:
+    """Compose the full-resolution app icon that every output size is resized from."""
+    canvas_size = APP_ICON_CANVAS_SIZE
 
     # Create rounded-rect background with toast color
     result = Image.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 0))
@@ -165,16 +328,83 @@ def render_app_icon(size: int) -> Image.Image:
     # Center character on canvas
     offset = (canvas_size - char_size) // 2
     result.paste(img, (offset, offset), img)
-
-    if size != canvas_size:
-        result = result.resize((size, size), Image.LANCZOS)
     return result
 
 
+@_profiled
+def _resize(img: Image.Image, size: int) -> Image.Image:
+    """LANCZOS-resize a square image."""
+    return img.resize((size, size), Image.LANCZOS)
+
+
+def _app_icon_master(svg_bytes: bytes) -> Image.Image:
+    return _cached_render("app-master", svg_bytes, APP_ICON_CANVAS_SIZE, _render_app_icon_master)
+
+
+def _app_icon_pyramid_level(svg_bytes: bytes, level: int) -> Image.Image:
+    """Mip level of the app icon master, built by halving the level above it."""
+    if level >= APP_ICON_CANVAS_SIZE:
+        return _app_icon_master(svg_bytes)
+    return _cached_render(
+        "app-pyramid",
+        svg_bytes,
+        level,
+        lambda: _resize(_app_icon_pyramid_level(svg_bytes, level * 2), level),
+    )
+
+
+def _app_icon_from_pyramid(svg_bytes: bytes, size: int) -> Image.Image:
+    """Resize from the smallest pyramid level that is still >= size."""
+    level = APP_ICON_CANVAS_SIZE
+    while level // 2 >= size:
+        level //= 2
+    img = _app_icon_pyramid_level(svg_bytes, level)
+    return img if level == size else _resize(img, size)
+
+
+@_profiled
+def render_app_icon(size: int, resample: Optional[str] = None) -> Image.Image:
+    """App icon (toast-colored background + character + rounded corners).
+
+    resample: "direct" (LANCZOS from the 1024px master) or "pyramid" (from the
+    nearest mip level); defaults to the mode selected with --resample.
+    """
+    resample = resample or _RESAMPLE
+    svg_bytes = _read_svg(SVG_PATH)
+    if size == APP_ICON_CANVAS_SIZE:
+        return _app_icon_master(svg_bytes)
+    if resample == "pyramid":
+        build = lambda: _app_icon_from_pyramid(svg_bytes, size)  # noqa: E731
+    else:
+        build = lambda: _resize(_app_icon_master(svg_bytes), size)  # noqa: E731
+    return _cached_render(f"app-icon:{resample}", svg_bytes, size, build)
+
+
+def _premultiplied(img: Image.Image) -> np.ndarray:
+    """RGBA array with color premultiplied by alpha (color of transparent pixels is irrelevant)."""
+    arr = np.asarray(img, dtype=np.int32)
+    arr[:, :, :3] = (arr[:, :, :3] * arr[:, :, 3:] + 127) // 255
+    return arr
+
+
+def verify_resample() -> dict[int, tuple[int, float]]:
+    """(max, mean) per-channel delta between pyramid and direct output, per app icon size.
+
+    Compared on premultiplied RGBA (0-255), so only visible differences count.
+    """
+    sizes = sorted(set(OUTPUT_FILES) | set(ICONSET_SIZES.values()))
+    deltas = {}
+    for size in sizes:
+        direct = _premultiplied(render_app_icon(size, "direct"))
+        pyramid = _premultiplied(render_app_icon(size, "pyramid"))
+        delta = np.abs(direct - pyramid)
+        deltas[size] = (int(delta.max()), float(delta.mean()))
+    return deltas
+
+
 def _make_eyes_svg() -> str:
     """Extract the eye paths from the SVG and return as an SVG string."""
-    with open(SVG_PATH) as f:
-        lines = f.readlines()
+    lines = _read_svg(SVG_PATH).decode("utf-8").splitlines(keepends=True)
 
     parts = []
     parts.append(lines[0])        # SVG header
@@ -185,61 +415,99 @@ def _make_eyes_svg() -> str:
 
 def _rasterize_eyes_svg(size: int) -> Image.Image:
     """Rasterize the eyes-only SVG at the given size."""
-    eyes_svg = _make_eyes_svg()
-    png_data = cairosvg.svg2png(
-        bytestring=eyes_svg.encode("utf-8"),
-        output_width=size,
-        output_height=size,
-    )
-    return Image.open(io.BytesIO(png_data)).convert("RGBA")
+    return _rasterize_svg_bytes(_make_eyes_svg().encode("utf-8"), size)
 
 
 def _make_tray_stencil(size: int) -> Image.Image:
+    """Cached wrapper around _build_tray_stencil (shared by both tray icons)."""
+    return _cached_render(
+        "tray-stencil",
+        _read_svg(SVG_PATH),
+        size,
+        lambda: _build_tray_stencil(size),
+    )
+
+
+def _fill_runs(region: np.ndarray, filled: np.ndarray) -> np.ndarray:
+    """Extend `filled` to every horizontal run of `region` it touches."""
+    # Label each run of True pixels per row (a run never continues onto the next row)
+    starts = region.copy()
+    starts[:, 1:] &= ~region[:, :-1]
+    run_id = np.cumsum(starts.ravel()).reshape(region.shape)
+    hit = np.zeros(run_id[-1, -1] + 1, dtype=bool)
+    hit[run_id[filled & region]] = True
+    return region & hit[run_id]
+
+
+def _grow_within(region: np.ndarray, seed: np.ndarray) -> np.ndarray:
+    """4-connected component(s) of `region` containing `seed`.
+
+    Alternates row and column run passes until stable, so it converges in a
+    handful of whole-array passes instead of visiting pixels one by one.
+    """
+    filled = seed & region
+    while True:
+        grown = _fill_runs(region, filled)
+        grown = _fill_runs(region.T, grown.T).T
+        if np.array_equal(grown, filled):
+            return grown
+        filled = grown
+
+
+@_profiled
+def _fill_from_corners(mask: np.ndarray) -> np.ndarray:
+    """Pixels reachable from the four corners through same-valued 4-neighbours.
+
+    Matches ImageDraw.floodfill seeded at each corner of a binary image.
+    """
+    h, w = mask.shape
+    filled = np.zeros_like(mask)
+    for y, x in ((0, 0), (0, w - 1), (h - 1, 0), (h - 1, w - 1)):
+        if filled[y, x]:
+            continue
+        seed = np.zeros_like(mask)
+        seed[y, x] = True
+        filled |= _grow_within(mask == mask[y, x], seed)
+    return filled
+
+
+@_profiled
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Dilate with a (2 * radius + 1) square (same as `radius` MaxFilter(3) passes)."""
+    k = 2 * radius + 1
+    padded = np.pad(mask, radius)
+    rows = sliding_window_view(padded, k, axis=1).any(axis=-1)
+    return sliding_window_view(rows, k, axis=0).any(axis=-1)
+
+
+@_profiled
+def _build_tray_stencil(size: int) -> Image.Image:
     """Generate a stencil with bread outline + ghost solid fill + eyes cut out.
 
     - Bread: white outline only
     - Ghost body: white solid fill
     - Eyes: transparent (cut out)
     """
-    # Ghost silhouette (flood-filled to close holes)
-    ghost = _rasterize_ghost_svg(size)
-    ghost_arr = np.array(ghost)
-    ghost_opaque = ghost_arr[:, :, 3] > 20
-
-    # Flood-fill from corners to identify outside, then invert to get hole-filled silhouette
-    ghost_binary = Image.fromarray(ghost_opaque.astype(np.uint8) * 255, mode="L").convert("RGB")
-    marker = (255, 0, 0)
-    for xy in [(0, 0), (size - 1, 0), (0, size - 1), (size - 1, size - 1)]:
-        ImageDraw.floodfill(ghost_binary, xy, marker, thresh=10)
-    filled_arr = np.array(ghost_binary)
-    outside = (filled_arr[:, :, 0] > 200) & (filled_arr[:, :, 1] < 100)
-    ghost_mask = ~outside  # Not outside = full ghost silhouette
+    # Ghost silhouette: everything not reachable from the corners (closes holes)
+    ghost_opaque = np.array(_rasterize_ghost_svg(size))[:, :, 3] > 20
+    ghost_mask = ~_fill_from_corners(ghost_opaque)
 
     # Eye cutout (dilated slightly larger)
-    eyes = _rasterize_eyes_svg(size)
-    eyes_arr = np.array(eyes)
-    eyes_alpha = Image.fromarray((eyes_arr[:, :, 3] > 20).astype(np.uint8) * 255)
-    for _ in range(8):
-        eyes_alpha = eyes_alpha.filter(ImageFilter.MaxFilter(3))
-    eyes_mask = np.array(eyes_alpha) > 128
+    eyes_mask = _dilate(np.array(_rasterize_eyes_svg(size))[:, :, 3] > 20, 8)
 
     ghost_body = ghost_mask & ~eyes_mask
 
     # Bread outline = full image (white background removed) - ghost silhouette
-    full = _rasterize_svg(size)
-    full = _remove_white_background(full)
-    full_arr = np.array(full)
-    full_opaque = full_arr[:, :, 3] > 20
+    full_arr = np.array(_rasterize_svg(size))
+    white = (full_arr[:, :, :3] >= WHITE_THRESHOLD).all(axis=2)
+    full_opaque = (full_arr[:, :, 3] > 20) & ~white
     bread_outline = full_opaque & ~ghost_mask
 
     # Composite: bread outline + ghost solid fill
     final = bread_outline | ghost_body
 
     result = np.zeros((size, size, 4), dtype=np.uint8)
-    result[final, 0] = 255  # White
-    result[final, 1] = 255
-    result[final, 2] = 255
-    result[final, 3] = 255
+    result[final] = 255  # White, opaque
     return Image.fromarray(result)
 
 
@@ -247,18 +515,20 @@ def render_tray_icon() -> Image.Image:
     """Tray icon (bread outline + ghost solid fill + eyes cut out, 44x44 @2x).
     For icon_as_template(true): macOS uses alpha channel only.
     """
-    img = _make_tray_stencil(1024)
-    return _crop_and_pad(img, TRAY_SIZE, padding_ratio=0.0)
+    return _cached_render(
+        "tray-icon",
+        _read_svg(SVG_PATH),
+        TRAY_SIZE,
+        lambda: _crop_and_pad(_make_tray_stencil(1024), TRAY_SIZE, padding_ratio=0.0),
+    )
 
 
 def render_tray_notification_icon() -> Image.Image:
     """Notification tray icon (bread outline + ghost solid fill + eyes cut out + dot badge, 44x44 @2x).
     For icon_as_template(false).
     """
-    img = _make_tray_stencil(1024)
-
-    # Resize stencil to 44x44 first (same size as normal tray icon)
-    img = _crop_and_pad(img, TRAY_SIZE, padding_ratio=0.0)
+    # Start from the normal 44x44 tray icon (shares the cached stencil)
+    img = render_tray_icon()
 
     # Overlay dot badge at top-right on the 44x44 image
     dot_r = 7
@@ -274,8 +544,9 @@ def render_tray_notification_icon() -> Image.Image:
     return img
 
 
-def render_toast_icon(name: str) -> Image.Image:
-    """Render a toast icon from SVG to black-on-transparent PNG at TOAST_ICON_SIZE.
+@_profiled
+def render_toast_icon(name: str, size: int = TOAST_ICON_SIZE) -> Image.Image:
+    """Render a toast icon from SVG to black-on-transparent PNG (TOAST_ICON_SIZE by default).
 
     For agent-specific icons (claude-code, codex, opencode), reads from toast/<name>.svg.
     For 'agentoast', reuses the main agentoast.svg.
@@ -285,12 +556,7 @@ def render_toast_icon(name: str) -> Image.Image:
     else:
         svg_path = os.path.join(TOAST_DIR, f"{name}.svg")
 
-    png_data = cairosvg.svg2png(
-        url=svg_path,
-        output_width=TOAST_ICON_SIZE,
-        output_height=TOAST_ICON_SIZE,
-    )
-    img = Image.open(io.BytesIO(png_data)).convert("RGBA")
+    img = _rasterize_svg_bytes(_read_svg(svg_path), size)
 
     # Remove white background (cairosvg may render with white bg)
     img = _remove_white_background(img)
@@ -304,20 +570,16 @@ def render_toast_icon(name: str) -> Image.Image:
     return Image.fromarray(arr)
 
 
-def render_toast_meta_icon(name: str) -> Image.Image:
-    """Render a toast metadata icon from SVG to black-on-transparent PNG at TOAST_META_ICON_SIZE.
+@_profiled
+def render_toast_meta_icon(name: str, size: int = TOAST_META_ICON_SIZE) -> Image.Image:
+    """Render a toast metadata icon from SVG to black-on-transparent PNG (TOAST_META_ICON_SIZE by default).
 
     Reads from toast/<name>.svg. Handles both stroke-based (git-branch) and
     fill-based (tmux) SVGs.
     """
     svg_path = os.path.join(TOAST_DIR, f"{name}.svg")
 
-    png_data = cairosvg.svg2png(
-        url=svg_path,
-        output_width=TOAST_META_ICON_SIZE,
-        output_height=TOAST_META_ICON_SIZE,
-    )
-    img = Image.open(io.BytesIO(png_data)).convert("RGBA")
+    img = _rasterize_svg_bytes(_read_svg(svg_path), size)
 
     # Remove white background (cairosvg may render with white bg)
     img = _remove_white_background(img)
@@ -331,62 +593,533 @@ def render_toast_meta_icon(name: str) -> Image.Image:
     return Image.fromarray(arr)
 
 
-def main() -> None:
-    if not os.path.exists(SVG_PATH):
-        print(f"Error: SVG not found: {SVG_PATH}")
-        sys.exit(1)
+@_profiled
+def render_toast_atlas(scales: tuple[int, ...]) -> tuple[Image.Image, dict]:
+    """Pack every toast and meta icon, at each scale, into one sprite sheet.
 
-    # App icon PNGs
-    for size, output_path in OUTPUT_FILES.items():
-        img = render_app_icon(size)
-        img.save(output_path)
-        print(f"Generated: {output_path} ({size}x{size})")
+    Each (scale, kind) pair gets its own row. Returns the atlas image and its
+    offset table: one sprite entry per (name, scale) with pixel x/y/width/height.
+    """
+    rows = []
+    for scale in scales:
+        toast_size = TOAST_ICON_SIZE * scale // 2
+        meta_size = TOAST_META_ICON_SIZE * scale // 2
+        rows.append([(name, scale, render_toast_icon(name, toast_size)) for name in TOAST_ICONS + ["agentoast"]])
+        rows.append([(name, scale, render_toast_meta_icon(name, meta_size)) for name in TOAST_META_ICONS])
+
+    width = max(sum(img.width + ATLAS_PADDING for _, _, img in row) for row in rows) - ATLAS_PADDING
+    height = sum(row[0][2].height + ATLAS_PADDING for row in rows) - ATLAS_PADDING
+
+    atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    sprites = []
+    y = 0
+    for row in rows:
+        x = 0
+        for name, scale, img in row:
+            atlas.paste(img, (x, y))
+            sprites.append({"name": name, "scale": scale, "x": x, "y": y, "width": img.width, "height": img.height})
+            x += img.width + ATLAS_PADDING
+        y += row[0][2].height + ATLAS_PADDING
+
+    table = {
+        "image": os.path.basename(ATLAS_PNG_PATH),
+        "width": width,
+        "height": height,
+        "sprites": sprites,
+    }
+    return atlas, table
+
+
+# --- Build jobs ---
+#
+# Each job is independent CPU-bound work and returns its outputs as
+# (path, png bytes, label) tuples. Outputs that share a master bitmap are
+# grouped into one job so the render cache stays effective inside a worker.
+
+
+class RenderJob(NamedTuple):
+    name: str
+    func: Callable[..., list[tuple[str, bytes, str]]]
+    args: tuple = ()
+    sources: tuple[str, ...] = ()  # Source SVG paths the outputs depend on
+    outputs: tuple[str, ...] = ()  # Output paths the job writes
+
+
+@_profiled
+def _png_bytes(img: Image.Image) -> bytes:
+    """Encode an image as PNG bytes."""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _icns_rle(channel: bytes) -> bytes:
+    """PackBits-style ICNS run-length encoding of one channel.
+
+    A header byte below 0x80 is followed by header + 1 literal bytes; 0x80 and
+    above repeats the next byte header - 125 times (runs of 3-130). Runs of 3 or
+    more are always emitted as runs, which matches iconutil byte for byte.
+    """
+    out = bytearray()
+    literal = bytearray()
+
+    def flush_literal() -> None:
+        for start in range(0, len(literal), 128):
+            chunk = literal[start : start + 128]
+            out.append(len(chunk) - 1)
+            out.extend(chunk)
+        literal.clear()
+
+    i = 0
+    while i < len(channel):
+        run = 1
+        while i + run < len(channel) and run < 130 and channel[i + run] == channel[i]:
+            run += 1
+        if run >= 3:
+            flush_literal()
+            out.append(run + 125)
+            out.append(channel[i])
+            i += run
+        else:
+            literal.append(channel[i])
+            i += 1
+    flush_literal()
+    return bytes(out)
+
+
+def _icns_argb(png_data: bytes) -> bytes:
+    """ARGB element data: 'ARGB', then the A, R, G and B planes, each RLE-compressed.
+
+    Channels are straight (not premultiplied) alpha, as iconutil writes them.
+    """
+    pixels = np.asarray(Image.open(io.BytesIO(png_data)).convert("RGBA"))
+    planes = (pixels[..., 3], pixels[..., 0], pixels[..., 1], pixels[..., 2])
+    return b"ARGB" + b"".join(_icns_rle(plane.tobytes()) for plane in planes)
 
-    # icon.icns
-    iconset_dir = tempfile.mkdtemp(suffix=".iconset")
-    try:
-        for filename, size in ICONSET_SIZES.items():
-            output_path = os.path.join(iconset_dir, filename)
-            img = render_app_icon(size)
-            img.save(output_path)
-
-        result = subprocess.run(
-            ["iconutil", "--convert", "icns", iconset_dir, "--output", ICNS_PATH],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode != 0:
-            print(f"Error running iconutil: {result.stderr}")
-            sys.exit(1)
 
-        print(f"Generated: {ICNS_PATH}")
-    finally:
-        shutil.rmtree(iconset_dir)
+@_profiled
+def encode_icns(entries: list[tuple[bytes, bytes]]) -> bytes:
+    """Encode (element type, PNG data) pairs as an ICNS container.
 
-    # Tray icon (normal)
-    tray = render_tray_icon()
-    tray.save(TRAY_ICON_PATH)
-    print(f"Generated: {TRAY_ICON_PATH} ({TRAY_SIZE}x{TRAY_SIZE})")
+    Layout: 'icns' magic + total length, then per element a 4-byte type,
+    a big-endian length (including its 8-byte header) and the element data:
+    the PNG itself, or for ICNS_ARGB_TYPES the PNG converted to RLE ARGB.
+    Same elements as `iconutil --convert icns` (minus its optional 'info'
+    plist), without a temp .iconset or macOS.
+    """
+    elements = [(ostype, _icns_argb(data) if ostype in ICNS_ARGB_TYPES else data) for ostype, data in entries]
+    buf = io.BytesIO()
+    total = 8 + sum(8 + len(data) for _, data in elements)
+    buf.write(b"icns" + struct.pack(">I", total))
+    for ostype, data in elements:
+        buf.write(ostype + struct.pack(">I", 8 + len(data)))
+        buf.write(data)
+    return buf.getvalue()
+
+
+def _job_app_icons() -> list[tuple[str, bytes, str]]:
+    """App icon PNGs + icon.icns (one element for every ICONSET_SIZES entry).
+
+    One job, so the 1024px master (and pyramid levels) is rendered once and
+    each size is encoded once, whether it ends up in a PNG, the icns, or both.
+    """
+    png_by_size: dict[int, bytes] = {}
 
-    # Tray icon (notification)
-    tray_notification = render_tray_notification_icon()
-    tray_notification.save(TRAY_ICON_NOTIFICATION_PATH)
-    print(f"Generated: {TRAY_ICON_NOTIFICATION_PATH} ({TRAY_SIZE}x{TRAY_SIZE})")
+    def png(size: int) -> bytes:
+        if size not in png_by_size:
+            png_by_size[size] = _png_bytes(render_app_icon(size))
+        return png_by_size[size]
 
+    outputs = [(output_path, png(size), f"{size}x{size}") for size, output_path in OUTPUT_FILES.items()]
+    entries = [(ICNS_TYPES[filename], png(size)) for filename, size in ICONSET_SIZES.items()]
+    outputs.append((ICNS_PATH, encode_icns(entries), ""))
+    return outputs
+
+
+def _job_tray_icons() -> list[tuple[str, bytes, str]]:
+    """Tray icons (normal + notification, sharing one stencil)."""
+    label = f"{TRAY_SIZE}x{TRAY_SIZE}"
+    return [
+        (TRAY_ICON_PATH, _png_bytes(render_tray_icon()), label),
+        (TRAY_ICON_NOTIFICATION_PATH, _png_bytes(render_tray_notification_icon()), label),
+    ]
+
+
+def _job_toast_icon(name: str) -> list[tuple[str, bytes, str]]:
+    """Toast icon (agent-specific or agentoast)."""
+    output_path = os.path.join(TOAST_DIR, f"{name}.png")
+    label = f"{TOAST_ICON_SIZE}x{TOAST_ICON_SIZE}"
+    return [(output_path, _png_bytes(render_toast_icon(name)), label)]
+
+
+def _job_toast_meta_icon(name: str) -> list[tuple[str, bytes, str]]:
+    """Toast metadata icon (git-branch, tmux, ...)."""
+    output_path = os.path.join(TOAST_DIR, f"{name}.png")
+    label = f"{TOAST_META_ICON_SIZE}x{TOAST_META_ICON_SIZE}"
+    return [(output_path, _png_bytes(render_toast_meta_icon(name)), label)]
+
+
+def _job_toast_atlas(scales: tuple[int, ...]) -> list[tuple[str, bytes, str]]:
+    """Toast sprite atlas + JSON offset table."""
+    atlas, table = render_toast_atlas(scales)
+    table_json = json.dumps(table, indent=2) + "\n"
+    return [
+        (ATLAS_PNG_PATH, _png_bytes(atlas), f"{atlas.width}x{atlas.height}"),
+        (ATLAS_JSON_PATH, table_json.encode("utf-8"), f"{len(table['sprites'])} sprites"),
+    ]
+
+
+def build_jobs(atlas_scales: Optional[tuple[int, ...]] = None) -> list[RenderJob]:
+    """All render jobs, in the order their outputs are written.
+
+    The app icon job (PNGs + icns, all from the 1024px master) is listed first
+    so the heaviest work is scheduled before the small toast icons.
+    """
+    jobs = [
+        RenderJob(
+            "app-icons",
+            _job_app_icons,
+            sources=(SVG_PATH,),
+            outputs=(*OUTPUT_FILES.values(), ICNS_PATH),
+        ),
+        RenderJob(
+            "tray-icons",
+            _job_tray_icons,
+            sources=(SVG_PATH,),
+            outputs=(TRAY_ICON_PATH, TRAY_ICON_NOTIFICATION_PATH),
+        ),
+    ]
     # Toast icons (agent-specific + agentoast)
-    all_toast_icons = TOAST_ICONS + ["agentoast"]
-    for name in all_toast_icons:
-        img = render_toast_icon(name)
-        output_path = os.path.join(TOAST_DIR, f"{name}.png")
-        img.save(output_path)
-        print(f"Generated: {output_path} ({TOAST_ICON_SIZE}x{TOAST_ICON_SIZE})")
-
-    # Toast metadata icons (git-branch, tmux)
+    for name in TOAST_ICONS + ["agentoast"]:
+        svg_path = SVG_PATH if name == "agentoast" else os.path.join(TOAST_DIR, f"{name}.svg")
+        jobs.append(
+            RenderJob(
+                f"toast:{name}",
+                _job_toast_icon,
+                (name,),
+                sources=(svg_path,),
+                outputs=(os.path.join(TOAST_DIR, f"{name}.png"),),
+            )
+        )
+    # Toast metadata icons (git-branch, tmux, x, trash)
     for name in TOAST_META_ICONS:
-        img = render_toast_meta_icon(name)
-        output_path = os.path.join(TOAST_DIR, f"{name}.png")
-        img.save(output_path)
-        print(f"Generated: {output_path} ({TOAST_META_ICON_SIZE}x{TOAST_META_ICON_SIZE})")
+        jobs.append(
+            RenderJob(
+                f"toast-meta:{name}",
+                _job_toast_meta_icon,
+                (name,),
+                sources=(os.path.join(TOAST_DIR, f"{name}.svg"),),
+                outputs=(os.path.join(TOAST_DIR, f"{name}.png"),),
+            )
+        )
+    # Toast sprite atlas (opt-in)
+    if atlas_scales:
+        toast_sources = [os.path.join(TOAST_DIR, f"{name}.svg") for name in TOAST_ICONS + TOAST_META_ICONS]
+        jobs.append(
+            RenderJob(
+                "toast-atlas",
+                _job_toast_atlas,
+                (atlas_scales,),
+                sources=(SVG_PATH, *toast_sources),
+                outputs=(ATLAS_PNG_PATH, ATLAS_JSON_PATH),
+            )
+        )
+    return jobs
+
+
+def _run_job(
+    job: RenderJob, profile: bool, resample: str = DEFAULT_RESAMPLE
+) -> tuple[list[tuple[str, bytes, str]], list[dict]]:
+    """Run one job (in a worker or in-process), returning its outputs and profile records."""
+    global _PROFILE_RECORDS, _PROFILE_JOB, _RESAMPLE
+    _RESAMPLE = resample
+    if not profile:
+        return job.func(*job.args), []
+
+    _PROFILE_RECORDS = []
+    _PROFILE_JOB = job.name
+    try:
+        with _stage("total"):
+            outputs = job.func(*job.args)
+        return outputs, _PROFILE_RECORDS
+    finally:
+        _PROFILE_RECORDS = None
+
+
+def run_jobs(
+    jobs: list[RenderJob], max_workers: int, profile: bool = False, resample: str = DEFAULT_RESAMPLE
+) -> list[tuple[list[tuple[str, bytes, str]], list[dict]]]:
+    """Run jobs (in a process pool when max_workers > 1) and return results in job order."""
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [_run_job(job, profile, resample) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = [pool.submit(_run_job, job, profile, resample) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def print_profile(records: list[dict]) -> None:
+    """Print profile records aggregated per (job, stage), in first-seen order,
+    followed by each worker process's peak RSS."""
+    rows: dict[tuple[str, str], dict] = {}
+    workers: dict[int, int] = {}
+    for record in records:
+        row = rows.setdefault(
+            (record["job"], record["stage"]),
+            {"calls": 0, "seconds": 0.0, "rss_growth_bytes": 0},
+        )
+        row["calls"] += 1
+        row["seconds"] += record["seconds"]
+        row["rss_growth_bytes"] += record["rss_growth_bytes"]
+        pid = record["pid"]
+        workers[pid] = max(workers.get(pid, 0), record["max_rss_bytes"])
+
+    print(f"\n{'job':<24} {'stage':<24} {'calls':>5} {'total ms':>10} {'+RSS MiB':>9}")
+    for (job, stage), row in rows.items():
+        print(
+            f"{job:<24} {stage:<24} {row['calls']:>5} "
+            f"{row['seconds'] * 1000:>10.1f} {row['rss_growth_bytes'] / (1 << 20):>9.2f}"
+        )
+    print()
+    for pid, max_rss in workers.items():
+        print(f"worker {pid:<8} peak RSS {max_rss / (1 << 20):>9.2f} MiB")
+
+
+# --- Incremental build manifest ---
+#
+# The manifest records, per job, a hash of its inputs (source SVGs + render
+# parameters) and the hash of every output it wrote. A job is stale when its
+# inputs changed or an output is missing or was modified since it was written.
+
+
+def render_params(resample: str = DEFAULT_RESAMPLE) -> dict:
+    """Render parameters that affect output pixels (part of every job's input hash)."""
+    return {
+        "pipeline_version": PIPELINE_VERSION,
+        "resample": resample,
+        "app_icon_bg_color": APP_ICON_BG_COLOR,
+        "app_icon_canvas_size": APP_ICON_CANVAS_SIZE,
+        "notification_dot_color": NOTIFICATION_DOT_COLOR,
+        "tray_size": TRAY_SIZE,
+        "white_threshold": WHITE_THRESHOLD,
+        "toast_icon_size": TOAST_ICON_SIZE,
+        "toast_meta_icon_size": TOAST_META_ICON_SIZE,
+        "output_sizes": sorted(OUTPUT_FILES),
+        "iconset_sizes": ICONSET_SIZES,
+        "icns_types": {name: ostype.decode("ascii") for name, ostype in ICNS_TYPES.items()},
+    }
+
+
+def _rel(path: str) -> str:
+    """Manifest key for a path (relative to the icons directory, POSIX separators)."""
+    return os.path.relpath(path, SCRIPT_DIR).replace(os.sep, "/")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_sha256(path: str) -> Optional[str]:
+    """Hash of a file's content, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return _sha256(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def _job_inputs_hash(job: RenderJob, params: dict) -> str:
+    """Hash of everything a job's outputs are derived from."""
+    key = {
+        "job": job.name,
+        "args": job.args,
+        "params": params,
+        "sources": {_rel(path): _file_sha256(path) for path in job.sources},
+    }
+    return _sha256(json.dumps(key, sort_keys=True).encode("utf-8"))
+
+
+def load_manifest() -> dict:
+    """Load the manifest (an empty one if missing or unreadable)."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"jobs": {}}
+    if not isinstance(manifest.get("jobs"), dict):
+        return {"jobs": {}}
+    return manifest
+
+
+def save_manifest(manifest: dict) -> None:
+    manifest["version"] = 1
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def is_job_stale(job: RenderJob, manifest: dict, params: dict) -> bool:
+    """Whether a job's recorded inputs or outputs no longer match the tree."""
+    entry = manifest["jobs"].get(job.name)
+    if not entry or entry.get("inputs") != _job_inputs_hash(job, params):
+        return True
+    recorded = entry.get("outputs", {})
+    return any(recorded.get(_rel(path)) != _file_sha256(path) for path in job.outputs)
+
+
+def record_job(manifest: dict, job: RenderJob, params: dict, outputs: list[tuple[str, bytes, str]]) -> None:
+    """Record a freshly rendered job in the manifest."""
+    manifest["jobs"][job.name] = {
+        "inputs": _job_inputs_hash(job, params),
+        "sources": {_rel(path): _file_sha256(path) for path in job.sources},
+        "outputs": {_rel(path): _sha256(data) for path, data, _ in outputs},
+    }
+
+
+def _parse_scales(value: str) -> tuple[int, ...]:
+    try:
+        scales = tuple(sorted({int(part) for part in value.split(",") if part.strip()}))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid scale list: {value!r}")
+    if not scales or any(scale not in (1, 2, 3) for scale in scales):
+        raise argparse.ArgumentTypeError(f"scales must be a subset of 1,2,3: {value!r}")
+    return scales
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate agentoast icons from SVG sources.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: CPU count, 1 = run in-process)",
+    )
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help="also pack the toast and meta icons into toast/atlas.png + toast/atlas.json",
+    )
+    parser.add_argument(
+        "--atlas-scales",
+        type=_parse_scales,
+        default=ATLAS_DEFAULT_SCALES,
+        metavar="1,2,3",
+        help="comma-separated scale factors to include in the atlas (default: 2)",
+    )
+    parser.add_argument(
+        "--resample",
+        choices=RESAMPLE_MODES,
+        default=DEFAULT_RESAMPLE,
+        help="app icon downscaling: direct LANCZOS from 1024px, or a progressive mip pyramid (default: direct)",
+    )
+    parser.add_argument(
+        "--verify-resample",
+        action="store_true",
+        help=f"compare pyramid vs direct app icon output and exit 1 if any pixel differs by more than {RESAMPLE_MAX_DELTA}",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-render every output, ignoring the manifest",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-stage wall time and peak RSS growth for each job (combine with --force for a full rebuild)",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="write raw per-stage profile records as JSON to PATH (implies --profile)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only verify that outputs match their sources (exit 1 if any are stale)",
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+
+    if not os.path.exists(SVG_PATH):
+        print(f"Error: SVG not found: {SVG_PATH}")
+        sys.exit(1)
+
+    if args.verify_resample:
+        deltas = verify_resample()
+        for size, (max_delta, mean_delta) in deltas.items():
+            status = "ok" if max_delta <= RESAMPLE_MAX_DELTA else "FAIL"
+            print(f"{size:>5}x{size:<5} max delta {max_delta:>3}  mean {mean_delta:.3f}  {status}")
+        if any(max_delta > RESAMPLE_MAX_DELTA for max_delta, _ in deltas.values()):
+            print(f"\nPyramid output exceeds the allowed delta ({RESAMPLE_MAX_DELTA}); keep --resample direct")
+            sys.exit(1)
+        print(f"\nPyramid output is within {RESAMPLE_MAX_DELTA} of direct at every size.")
+        return
+
+    params = render_params(args.resample)
+    manifest = load_manifest()
+    jobs = build_jobs(args.atlas_scales if args.atlas else None)
+    stale = [job for job in jobs if args.force or is_job_stale(job, manifest, params)]
+
+    if args.check:
+        for job in stale:
+            print(f"Stale: {job.name} ({', '.join(_rel(path) for path in job.outputs)})")
+        if stale:
+            print(f"\n{len(stale)} of {len(jobs)} icon jobs are out of date; run generate_icons.py")
+            sys.exit(1)
+        print("All icons are up to date.")
+        return
+
+    if not stale:
+        print("All icons are up to date.")
+        return
+
+    profile = args.profile or bool(args.profile_json)
+    started = time.perf_counter()
+    results = run_jobs(stale, args.jobs, profile, args.resample)
+    render_seconds = time.perf_counter() - started
+    records = [record for _, job_records in results for record in job_records]
+
+    # Write outputs in deterministic (job) order, regardless of completion order
+    for job, (outputs, _) in zip(stale, results):
+        for output_path, data, label in outputs:
+            write_started = time.perf_counter()
+            with open(output_path, "wb") as f:
+                f.write(data)
+            if profile:
+                records.append(
+                    {
+                        "job": job.name,
+                        "stage": "write",
+                        "seconds": time.perf_counter() - write_started,
+                        "rss_growth_bytes": 0,
+                        "max_rss_bytes": _max_rss_bytes(),
+                        "pid": os.getpid(),
+                    }
+                )
+            if label:
+                print(f"Generated: {output_path} ({label})")
+            else:
+                print(f"Generated: {output_path}")
+        record_job(manifest, job, params, outputs)
+
+    save_manifest(manifest)
+
+    if profile:
+        print_profile(records)
+        print(f"\nRender wall time: {render_seconds * 1000:.1f} ms ({args.jobs} worker(s))")
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            json.dump(
+                {"jobs": args.jobs, "render_seconds": render_seconds, "records": records},
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"Profile written: {args.profile_json}")
 
     print("\nDone!")
 
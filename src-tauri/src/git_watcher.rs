@@ -0,0 +1,296 @@
+//! Filesystem watches on the git directories behind `git_info`'s cache.
+//!
+//! Without this, every `resolve_git_info` call re-reads HEAD so the 2s
+//! sessions poller notices checkouts: one file read per pane per cycle. Once
+//! `start` installs the watch hooks, each cached repository's gitdir (HEAD)
+//! and common dir (config, packed-refs) are watched non-recursively and
+//! lookups are served from memory. A HEAD or packed-refs change re-reads HEAD
+//! and updates the affected entries in place, keeping their watches; a
+//! config change (or the directory going away) drops them. Either way an
+//! immediate sessions refresh follows, so a new branch shows up right away
+//! instead of on the next poll. Events are
+//! not guaranteed (FSEvents can drop some while its stream restarts to add a
+//! path), so `git_info` still re-reads HEAD of watched entries every few
+//! seconds.
+//!
+//! Watches are reference-counted per cache entry: when the last entry using
+//! a directory is evicted or invalidated, the directory is unwatched, and at
+//! most `MAX_WATCHED_DIRS` are watched at once.
+//!
+//! Best effort throughout: if a watch cannot be set up, `git_info` keeps
+//! re-reading HEAD for that repository.
+
+use std::collections::HashMap;
+use std::path::{Path, PathBuf};
+use std::sync::mpsc;
+use std::sync::{Arc, Mutex};
+use std::time::Duration;
+
+use agentoast_shared::git_info;
+use notify::{Event, RecommendedWatcher, RecursiveMode, Watcher};
+use tauri::AppHandle;
+
+/// Files whose change can move the checked-out branch: HEAD is re-read.
+const HEAD_FILES: &[&str] = &["HEAD", "packed-refs"];
+
+/// Files whose change can alter the rest of what `git_info` reports (the
+/// origin URL): the entries are re-resolved.
+const CONFIG_FILES: &[&str] = &["config"];
+
+/// Collapses the burst of events from one git operation (`HEAD.lock`
+/// written, renamed over HEAD, ...) into a single refresh.
+const REFRESH_DEBOUNCE: Duration = Duration::from_millis(50);
+
+/// Upper bound on directories watched at once. Past it, new repositories
+/// are left unwatched and `git_info` re-reads their HEAD instead.
+const MAX_WATCHED_DIRS: usize = 256;
+
+/// Which directories are watched and by how many `git_info` cache entries.
+#[derive(Default)]
+struct WatchState {
+    /// Canonical directory (the form event paths arrive in) → the path(s)
+    /// `git_info` cached it under.
+    by_canonical: HashMap<PathBuf, Vec<PathBuf>>,
+    /// Path as `git_info` passed it → (canonical directory, references).
+    refs: HashMap<PathBuf, (PathBuf, usize)>,
+}
+
+impl WatchState {
+    /// Take another reference on `dir` if it is already watched under this
+    /// exact path.
+    fn acquire(&mut self, dir: &Path) -> bool {
+        match self.refs.get_mut(dir) {
+            Some((_, count)) => {
+                *count += 1;
+                true
+            }
+            None => false,
+        }
+    }
+
+    /// Record a first reference on `dir`, whose watch is on `canonical`.
+    fn add(&mut self, dir: &Path, canonical: PathBuf) {
+        let registered = self.by_canonical.entry(canonical.clone()).or_default();
+        if !registered.iter().any(|p| p == dir) {
+            registered.push(dir.to_path_buf());
+        }
+        self.refs
+            .entry(dir.to_path_buf())
+            .or_insert((canonical, 0))
+            .1 += 1;
+    }
+
+    /// Drop one reference on `dir`. Returns the canonical directory once no
+    /// path refers to it any more, i.e. when its watch should be removed.
+    fn release(&mut self, dir: &Path) -> Option<PathBuf> {
+        let (canonical, count) = self.refs.get_mut(dir)?;
+        *count -= 1;
+        if *count > 0 {
+            return None;
+        }
+        let canonical = canonical.clone();
+        self.refs.remove(dir);
+        let registered = self.by_canonical.get_mut(&canonical)?;
+        registered.retain(|p| p != dir);
+        if !registered.is_empty() {
+            return None;
+        }
+        self.by_canonical.remove(&canonical);
+        Some(canonical)
+    }
+}
+
+type SharedState = Arc<Mutex<WatchState>>;
+
+pub fn start(app_handle: AppHandle) {
+    let state: SharedState = Arc::default();
+    let (refresh_tx, refresh_rx) = mpsc::channel::<()>();
+    let (unwatch_tx, unwatch_rx) = mpsc::channel::<PathBuf>();
+
+    let state_for_events = state.clone();
+    let watcher = notify::recommended_watcher(move |res: notify::Result<Event>| {
+        let Ok(event) = res else {
+            return;
+        };
+        if invalidate_for_event(&state_for_events, &event) {
+            let _ = refresh_tx.send(());
+        }
+    });
+    let watcher = match watcher {
+        Ok(w) => Arc::new(Mutex::new(w)),
+        Err(e) => {
+            log::warn!("git watcher unavailable, falling back to HEAD reads: {}", e);
+            return;
+        }
+    };
+
+    let watcher_for_hook = watcher.clone();
+    let state_for_watch = state.clone();
+    let state_for_release = state.clone();
+    let unwatch_tx_for_watch = unwatch_tx.clone();
+    git_info::set_watch_hooks(
+        move |gitdir, common_dir| {
+            let Ok(mut watcher) = watcher_for_hook.lock() else {
+                return false;
+            };
+            if !watch_dir(&mut watcher, &state_for_watch, gitdir) {
+                return false;
+            }
+            if watch_dir(&mut watcher, &state_for_watch, common_dir) {
+                return true;
+            }
+            release_dir(&state_for_watch, &unwatch_tx_for_watch, gitdir);
+            false
+        },
+        move |gitdir, common_dir| {
+            release_dir(&state_for_release, &unwatch_tx, gitdir);
+            release_dir(&state_for_release, &unwatch_tx, common_dir);
+        },
+    );
+
+    // Releases arrive on the event thread (via `invalidate_gitdir` and
+    // `refresh_head`), where `unwatch` must not be called: it can wait on
+    // that very thread.
+    std::thread::spawn(move || {
+        for canonical in unwatch_rx {
+            let Ok(mut watcher) = watcher.lock() else {
+                return;
+            };
+            // Re-watched since it was queued (both happen under `watcher`).
+            let rewatched = state
+                .lock()
+                .is_ok_and(|guard| guard.by_canonical.contains_key(&canonical));
+            if rewatched {
+                continue;
+            }
+            if let Err(e) = watcher.unwatch(&canonical) {
+                log::debug!("git watcher: cannot unwatch {}: {}", canonical.display(), e);
+            }
+        }
+    });
+
+    std::thread::spawn(move || {
+        while refresh_rx.recv().is_ok() {
+            while refresh_rx.recv_timeout(REFRESH_DEBOUNCE).is_ok() {}
+            crate::refresh_and_emit(&app_handle);
+        }
+    });
+}
+
+/// Take a reference on `dir`, starting a watch if nothing covers it yet.
+/// Called with the watcher locked, so watches never race each other.
+fn watch_dir(watcher: &mut RecommendedWatcher, state: &SharedState, dir: &Path) -> bool {
+    if state.lock().is_ok_and(|mut guard| guard.acquire(dir)) {
+        return true;
+    }
+    let Ok(canonical) = dir.canonicalize() else {
+        return false;
+    };
+    {
+        let Ok(mut guard) = state.lock() else {
+            return false;
+        };
+        if guard.by_canonical.contains_key(&canonical) {
+            guard.add(dir, canonical);
+            return true;
+        }
+        if guard.by_canonical.len() >= MAX_WATCHED_DIRS {
+            log::debug!(
+                "git watcher: {} directories watched, not adding {}",
+                MAX_WATCHED_DIRS,
+                canonical.display()
+            );
+            return false;
+        }
+    }
+    // Not holding `state` here: the event callback needs it, and `watch` may
+    // wait on the event thread.
+    if let Err(e) = watcher.watch(&canonical, RecursiveMode::NonRecursive) {
+        log::debug!("git watcher: cannot watch {}: {}", canonical.display(), e);
+        return false;
+    }
+    match state.lock() {
+        Ok(mut guard) => {
+            guard.add(dir, canonical);
+            true
+        }
+        Err(_) => false,
+    }
+}
+
+/// Drop a reference on `dir`, queueing its unwatch when it was the last.
+fn release_dir(state: &SharedState, unwatch_tx: &mpsc::Sender<PathBuf>, dir: &Path) {
+    let unwatch = state.lock().ok().and_then(|mut guard| guard.release(dir));
+    if let Some(canonical) = unwatch {
+        let _ = unwatch_tx.send(canonical);
+    }
+}
+
+/// Update or drop the `git_info` entries an event affects. Returns whether
+/// anything changed. Dropped entries hand their watches back through
+/// `release_dir`, so a deleted repository stops being watched and a
+/// re-created one gets a fresh watch; a checkout keeps the existing watch.
+fn invalidate_for_event(state: &SharedState, event: &Event) -> bool {
+    let mut head_dirs = Vec::new();
+    let mut dropped_dirs = Vec::new();
+    if let Ok(guard) = state.lock() {
+        for path in &event.paths {
+            let file_name = path.file_name().and_then(|n| n.to_str());
+            let registered = path.parent().and_then(|p| guard.by_canonical.get(p));
+            if let (Some(name), Some(registered)) = (file_name, registered) {
+                if HEAD_FILES.contains(&name) {
+                    head_dirs.extend(registered.iter().cloned());
+                } else if CONFIG_FILES.contains(&name) {
+                    dropped_dirs.extend(registered.iter().cloned());
+                }
+            }
+            // The watched directory itself went away (repo deleted, worktree
+            // pruned).
+            if event.kind.is_remove() {
+                if let Some(registered) = guard.by_canonical.get(path) {
+                    dropped_dirs.extend(registered.iter().cloned());
+                }
+            }
+        }
+    }
+
+    let mut changed = false;
+    for dir in dropped_dirs {
+        changed |= git_info::invalidate_gitdir(&dir);
+    }
+    for dir in head_dirs {
+        changed |= git_info::refresh_head(&dir);
+    }
+    changed
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn watch_is_released_with_the_last_reference() {
+        let mut state = WatchState::default();
+        let canonical = PathBuf::from("/private/tmp/repo/.git");
+        let via_symlink = Path::new("/tmp/repo/.git");
+        let direct = Path::new("/private/tmp/repo/.git");
+
+        state.add(via_symlink, canonical.clone());
+        assert!(state.acquire(via_symlink));
+        state.add(direct, canonical.clone());
+
+        assert_eq!(state.release(via_symlink), None);
+        assert_eq!(state.release(via_symlink), None);
+        assert!(!state.acquire(via_symlink));
+        assert_eq!(state.by_canonical[&canonical], vec![direct.to_path_buf()]);
+        assert_eq!(state.release(direct), Some(canonical));
+        assert!(state.by_canonical.is_empty());
+        assert!(state.refs.is_empty());
+    }
+
+    #[test]
+    fn release_of_unknown_dir_is_ignored() {
+        let mut state = WatchState::default();
+        assert_eq!(state.release(Path::new("/nowhere/.git")), None);
+    }
+}
@@ -3,6 +3,8 @@ mod app_nap;
 #[cfg(target_os = "macos")]
 mod apps;
 #[cfg(target_os = "macos")]
+mod git_watcher;
+#[cfg(target_os = "macos")]
 mod macos_hotkeys;
 #[cfg(target_os = "macos")]
 mod native_toast;
@@ -25,7 +27,9 @@ use std::time::Duration;
 
 use agentoast_shared::config::{self, AllowedApp, AppConfig, ToastDisplay, ToastPosition};
 use agentoast_shared::db;
+use agentoast_shared::git_info;
 use agentoast_shared::models::{Notification, TmuxPaneGroup};
+use agentoast_shared::retention;
 use serde::{Deserialize, Serialize};
 use tauri::{Emitter, Manager};
 use tauri_plugin_global_shortcut::{GlobalShortcutExt, ShortcutState};
@@ -162,6 +166,39 @@ fn start_sessions_safety_poller(app_handle: tauri::AppHandle, interval: Duration
     });
 }
 
+/// Enforce `[notification.retention]` on a background thread: once shortly
+/// after startup, then every `retention::COMPACTION_INTERVAL`.
+fn start_retention_compaction(db_path: std::path::PathBuf, retention: config::RetentionConfig) {
+    std::thread::spawn(move || {
+        let conn = match db::open_reader(&db_path) {
+            Ok(c) => c,
+            Err(e) => {
+                log::error!("Failed to open DB for retention compaction: {}", e);
+                return;
+            }
+        };
+        // Let startup (window creation, first sessions refresh) settle first.
+        std::thread::sleep(Duration::from_secs(30));
+        loop {
+            match retention::compact(&conn, &retention) {
+                Ok(stats) => log::info!("retention: compaction done {:?}", stats),
+                Err(e) => log::warn!("retention: compaction failed: {}", e),
+            }
+            std::thread::sleep(retention::COMPACTION_INTERVAL);
+        }
+    });
+}
+
+/// Write the git info the sessions poller resolved from scratch to the
+/// persistent cache, every `git_info::PERSIST_INTERVAL`, so the poll path
+/// never writes to or lists the cache directory.
+fn start_git_info_persister() {
+    std::thread::spawn(|| loop {
+        std::thread::sleep(git_info::PERSIST_INTERVAL);
+        git_info::flush_persistent_cache();
+    });
+}
+
 /// Register / unregister the running app as a macOS Login Item via the
 /// `SMAppService.mainApp` API (macOS 13+). Unlike the older
 /// `osascript`-based approaches, this does NOT trigger the Automation /
@@ -507,14 +544,40 @@ async fn get_focused_pane() -> Result<Option<agentoast_shared::models::TmuxPane>
     }
 }
 
+/// Newest-first page of notifications. Pass the `createdAt` / `id` of the
+/// last row already loaded as `beforeCreatedAt` / `beforeId` to fetch the
+/// next page; omit both for the first page. Passing only one is an error
+/// rather than silently returning the first page again.
 #[tauri::command]
 fn get_notifications(
     state: tauri::State<'_, Mutex<AppState>>,
     limit: Option<i64>,
+    before_created_at: Option<String>,
+    before_id: Option<i64>,
 ) -> Result<Vec<Notification>, String> {
+    let before = match (&before_created_at, before_id) {
+        (Some(created_at), Some(id)) => Some((created_at.as_str(), id)),
+        (None, None) => None,
+        _ => {
+            return Err("beforeCreatedAt and beforeId must be given together".to_string());
+        }
+    };
     let state = state.lock().map_err(|e| e.to_string())?;
     let conn = db::open_reader(&state.db_path).map_err(|e| e.to_string())?;
-    db::get_notifications(&conn, limit.unwrap_or(100)).map_err(|e| e.to_string())
+    db::get_notifications_page(&conn, before, limit.unwrap_or(100)).map_err(|e| e.to_string())
+}
+
+/// Indexed full-text search across all retained notifications (not just the
+/// page loaded in the panel).
+#[tauri::command]
+fn search_notifications(
+    state: tauri::State<'_, Mutex<AppState>>,
+    query: String,
+    limit: Option<i64>,
+) -> Result<Vec<Notification>, String> {
+    let state = state.lock().map_err(|e| e.to_string())?;
+    let conn = db::open_reader(&state.db_path).map_err(|e| e.to_string())?;
+    db::search_notifications(&conn, &query, limit.unwrap_or(100)).map_err(|e| e.to_string())
 }
 
 #[tauri::command]
@@ -1221,6 +1284,7 @@ pub fn run() {
             get_sessions,
             get_focused_pane,
             get_notifications,
+            search_notifications,
             get_unread_count,
             delete_notification,
             delete_notifications_by_pane,
@@ -1280,6 +1344,7 @@ pub fn run() {
 
             let shortcut_str = app_config.keybinding.toggle_panel.clone();
             let initial_muted = app_config.notification.muted;
+            let retention_config = app_config.notification.retention.clone();
 
             // Ensure DB is initialized
             let _ = db::open(&db_path).expect("Failed to initialize database");
@@ -1366,6 +1431,15 @@ pub fn run() {
                 log::error!("Failed to init native toast: {}", e);
             }
 
+            start_retention_compaction(db_path.clone(), retention_config);
+            start_git_info_persister();
+
+            // Serve cached git info from memory; HEAD changes update it,
+            // config changes invalidate it, and both refresh sessions
+            // immediately.
+            #[cfg(target_os = "macos")]
+            git_watcher::start(app.handle().clone());
+
             // Start DB watcher
             watcher::start(app.handle().clone(), db_path);
 
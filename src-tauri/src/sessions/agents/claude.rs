@@ -1,6 +1,6 @@
 use std::time::Instant;
 
-use agentoast_shared::{db, models::AgentStatus};
+use agentoast_shared::models::AgentStatus;
 
 use super::{is_numbered_option, AgentDetectionResult};
 use crate::sessions::hysteresis::InputRegion;
@@ -26,7 +26,7 @@ struct ClaudePaneContentInfo {
 }
 
 pub(super) fn detect_claude_status(
-    db_conn: &Option<db::Connection>,
+    has_notification: bool,
     pane_id: &str,
     content: Option<&str>,
     last_changed_at: Option<Instant>,
@@ -84,13 +84,7 @@ pub(super) fn detect_claude_status(
         // dialogs still win during a recent hash change.
         (AgentStatus::Running, None)
     } else if info.at_prompt {
-        let has_recent_notif = db_conn.as_ref().is_some_and(|conn| {
-            matches!(
-                db::get_latest_notification_by_pane(conn, pane_id),
-                Ok(Some(_))
-            )
-        });
-        if has_recent_notif {
+        if has_notification {
             (AgentStatus::Waiting, None)
         } else {
             (AgentStatus::Idle, None)
@@ -831,7 +825,7 @@ mod tests {
 
     #[test]
     fn detects_running_when_fork_is_active_without_parent_spinner() {
-        let result = detect_claude_status(&None, "%4", Some(FORK_RUNNING_NO_PARENT_SPINNER), None);
+        let result = detect_claude_status(false, "%4", Some(FORK_RUNNING_NO_PARENT_SPINNER), None);
         assert_eq!(
             result.status,
             AgentStatus::Running,
@@ -842,7 +836,7 @@ mod tests {
 
     #[test]
     fn fork_count_added_to_agent_modes() {
-        let result = detect_claude_status(&None, "%4", Some(FORK_RUNNING_NO_PARENT_SPINNER), None);
+        let result = detect_claude_status(false, "%4", Some(FORK_RUNNING_NO_PARENT_SPINNER), None);
         assert!(
             result.agent_modes.iter().any(|m| m.ends_with("fork")),
             "expected fork count badge in agent_modes, got: {:?}",
@@ -926,7 +920,7 @@ another history line
     #[test]
     fn hash_assist_recent_change_promotes_to_running() {
         let result = detect_claude_status(
-            &None,
+            false,
             "%9",
             Some(AT_PROMPT_NO_SPINNER),
             Some(Instant::now()),
@@ -942,7 +936,7 @@ another history line
     #[test]
     fn hash_assist_stale_falls_through_to_idle() {
         let stale = Instant::now() - CHANGE_TTL - std::time::Duration::from_millis(500);
-        let result = detect_claude_status(&None, "%9", Some(AT_PROMPT_NO_SPINNER), Some(stale));
+        let result = detect_claude_status(false, "%9", Some(AT_PROMPT_NO_SPINNER), Some(stale));
         assert_eq!(
             result.status,
             AgentStatus::Idle,
@@ -955,7 +949,7 @@ another history line
     fn hash_assist_none_preserves_legacy_idle() {
         // No hash assist available (first-seen pane / input not found) —
         // judgement must match the pre-change behavior exactly.
-        let result = detect_claude_status(&None, "%9", Some(AT_PROMPT_NO_SPINNER), None);
+        let result = detect_claude_status(false, "%9", Some(AT_PROMPT_NO_SPINNER), None);
         assert_eq!(result.status, AgentStatus::Idle);
     }
 
@@ -976,7 +970,7 @@ some history line
     #[test]
     fn hash_assist_runs_even_when_at_prompt_is_false() {
         let result = detect_claude_status(
-            &None,
+            false,
             "%9",
             Some(STREAMING_NO_INPUT_BOX),
             Some(Instant::now()),
@@ -995,7 +989,7 @@ some history line
         // the existing fallback (Idle) takes over. This is the natural
         // recovery path after interrupt with no further activity.
         let stale = Instant::now() - CHANGE_TTL - std::time::Duration::from_millis(500);
-        let result = detect_claude_status(&None, "%9", Some(STREAMING_NO_INPUT_BOX), Some(stale));
+        let result = detect_claude_status(false, "%9", Some(STREAMING_NO_INPUT_BOX), Some(stale));
         assert_eq!(result.status, AgentStatus::Idle);
     }
 
@@ -1,4 +1,4 @@
-use agentoast_shared::{db, models::AgentStatus};
+use agentoast_shared::models::AgentStatus;
 
 use super::{is_numbered_option, AgentDetectionResult};
 
@@ -17,7 +17,7 @@ struct CodexPaneContentInfo {
 }
 
 pub(super) fn detect_codex_status(
-    db_conn: &Option<db::Connection>,
+    has_notification: bool,
     pane_id: &str,
     content: Option<&str>,
 ) -> AgentDetectionResult {
@@ -40,12 +40,8 @@ pub(super) fn detect_codex_status(
         // cursor (› N.) can be misidentified as a prompt.
         (AgentStatus::Waiting, Some("respond".to_string()))
     } else if info.at_prompt {
-        if let Some(conn) = db_conn {
-            if let Ok(Some(_)) = db::get_latest_notification_by_pane(conn, pane_id) {
-                (AgentStatus::Waiting, None)
-            } else {
-                (AgentStatus::Idle, None)
-            }
+        if has_notification {
+            (AgentStatus::Waiting, None)
         } else {
             (AgentStatus::Idle, None)
         }
@@ -1,4 +1,4 @@
-use agentoast_shared::{db, models::AgentStatus};
+use agentoast_shared::models::AgentStatus;
 
 use super::{is_numbered_option, AgentDetectionResult};
 
@@ -32,7 +32,7 @@ struct CopilotPaneContentInfo {
 }
 
 pub(super) fn detect_copilot_status(
-    db_conn: &Option<db::Connection>,
+    has_notification: bool,
     pane_id: &str,
     content: Option<&str>,
 ) -> AgentDetectionResult {
@@ -56,12 +56,8 @@ pub(super) fn detect_copilot_status(
         // Question/elicitation dialog: selection cursor without tool approval text
         (AgentStatus::Waiting, Some("respond".to_string()))
     } else if info.at_prompt {
-        if let Some(conn) = db_conn {
-            if let Ok(Some(_)) = db::get_latest_notification_by_pane(conn, pane_id) {
-                (AgentStatus::Waiting, None)
-            } else {
-                (AgentStatus::Idle, None)
-            }
+        if has_notification {
+            (AgentStatus::Waiting, None)
         } else {
             (AgentStatus::Idle, None)
         }
@@ -3,7 +3,7 @@ use std::process::Command;
 use std::sync::atomic::{AtomicU64, Ordering};
 use std::time::Instant;
 
-use agentoast_shared::{db, models::AgentStatus};
+use agentoast_shared::models::AgentStatus;
 
 use crate::terminal::find_tmux;
 
@@ -188,18 +188,23 @@ pub(super) fn is_numbered_option(line: &str) -> bool {
 /// used as a short-term Running assist on Claude's `at_prompt` path. Only
 /// the Claude detector takes it today — adding it to the other detectors
 /// would just produce three dead args.
+///
+/// `has_notification` says whether the pane has a pending notification; the
+/// caller resolves it for every pane with one batched DB query per cycle.
 pub(super) fn detect_agent_status_with_content(
-    db_conn: &Option<db::Connection>,
+    has_notification: bool,
     pane_id: &str,
     agent_type: &str,
     content: Option<&str>,
     last_changed_at: Option<Instant>,
 ) -> AgentDetectionResult {
     match agent_type {
-        "claude-code" => claude::detect_claude_status(db_conn, pane_id, content, last_changed_at),
-        "codex" => codex::detect_codex_status(db_conn, pane_id, content),
-        "copilot-cli" => copilot::detect_copilot_status(db_conn, pane_id, content),
-        "opencode" => opencode::detect_opencode_status(db_conn, pane_id, content),
+        "claude-code" => {
+            claude::detect_claude_status(has_notification, pane_id, content, last_changed_at)
+        }
+        "codex" => codex::detect_codex_status(has_notification, pane_id, content),
+        "copilot-cli" => copilot::detect_copilot_status(has_notification, pane_id, content),
+        "opencode" => opencode::detect_opencode_status(has_notification, pane_id, content),
         _ => {
             log::debug!(
                 "detect_agent_status({}): unknown agent_type='{}', defaulting to Running",
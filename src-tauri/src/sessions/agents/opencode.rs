@@ -1,4 +1,4 @@
-use agentoast_shared::{db, models::AgentStatus};
+use agentoast_shared::models::AgentStatus;
 
 use super::AgentDetectionResult;
 
@@ -13,7 +13,7 @@ struct OpencodePaneContentInfo {
 }
 
 pub(super) fn detect_opencode_status(
-    db_conn: &Option<db::Connection>,
+    has_notification: bool,
     pane_id: &str,
     content: Option<&str>,
 ) -> AgentDetectionResult {
@@ -32,13 +32,9 @@ pub(super) fn detect_opencode_status(
     } else if info.has_permission_dialog || info.has_selection_dialog {
         (AgentStatus::Waiting, Some("respond".to_string()))
     } else {
-        // No running signal — check DB for pending notifications
-        if let Some(conn) = db_conn {
-            if let Ok(Some(_)) = db::get_latest_notification_by_pane(conn, pane_id) {
-                (AgentStatus::Waiting, None)
-            } else {
-                (AgentStatus::Idle, None)
-            }
+        // No running signal — a pending notification means Waiting
+        if has_notification {
+            (AgentStatus::Waiting, None)
         } else {
             (AgentStatus::Idle, None)
         }
@@ -176,6 +176,16 @@ pub fn list_tmux_panes_grouped(
         })
         .collect();
 
+    // Pending-notification lookup for every agent pane in one query, rather
+    // than one per pane that turns out to be sitting at its prompt.
+    let notified_panes: HashSet<String> = match db_conn {
+        Some(conn) => db::get_panes_with_notifications(conn, &agent_pane_ids).unwrap_or_else(|e| {
+            log::warn!("sessions: notification lookup failed: {}", e);
+            HashSet::new()
+        }),
+        None => HashSet::new(),
+    };
+
     // Single-shot hysteresis observation. The write lock spans only the
     // in-memory hash computation (no tmux / DB / git I/O), so contention
     // with `emit_cached_sessions` and the get_sessions command stays
@@ -194,7 +204,7 @@ pub fn list_tmux_panes_grouped(
         HashMap::new()
     };
 
-    // Build TmuxPane with git info and agent status (DB lookups on main thread)
+    // Build TmuxPane with git info and agent status
     let panes: Vec<TmuxPane> = raw_panes
         .into_iter()
         .enumerate()
@@ -208,7 +218,7 @@ pub fn list_tmux_panes_grouped(
                     // "no hash assist for this pane this cycle".
                     let last_changed = last_changed_map.get(&rp.pane_id).copied();
                     let r = detect_agent_status_with_content(
-                        db_conn,
+                        notified_panes.contains(&rp.pane_id),
                         &rp.pane_id,
                         at,
                         content,
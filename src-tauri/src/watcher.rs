@@ -5,6 +5,7 @@ use std::time::{Duration, Instant};
 
 use agentoast_shared::db;
 use agentoast_shared::db::Connection;
+use agentoast_shared::{config, wake};
 use notify::{EventKind, RecommendedWatcher, RecursiveMode, Watcher};
 use tauri::image::Image;
 use tauri::path::BaseDirectory;
@@ -14,6 +15,14 @@ use tauri::{AppHandle, Emitter, Manager};
 use crate::native_toast;
 use crate::MuteState;
 
+/// Polling fallback interval for changes the file watcher missed.
+const POLL_INTERVAL: Duration = Duration::from_secs(1);
+
+/// Serializes `check_new_notifications` across the watcher, wake and polling
+/// threads so two of them can't read the same `LAST_KNOWN_ID` and toast the
+/// same rows twice.
+static CHECK_LOCK: Mutex<()> = Mutex::new(());
+
 static LAST_KNOWN_ID: AtomicI64 = AtomicI64::new(0);
 // Snapshot of the last unread count we observed. -1 marks "not yet initialized"
 // so the first tick only seeds the baseline without firing a spurious refresh.
@@ -23,6 +32,52 @@ static LAST_KNOWN_ID: AtomicI64 = AtomicI64::new(0);
 // below won't notice a DELETE-only change.
 static LAST_UNREAD_COUNT: AtomicI64 = AtomicI64::new(-1);
 
+/// Per-connection change detector built on `PRAGMA data_version`.
+///
+/// Each reader thread owns one. `changed` costs a single pragma read, so the
+/// watcher can react to file events almost immediately and the poller can
+/// tick often without re-running the unread-count / after-id queries while
+/// the database is idle.
+struct ChangeGate {
+    last_data_version: Option<i64>,
+}
+
+impl ChangeGate {
+    fn new() -> Self {
+        Self {
+            last_data_version: None,
+        }
+    }
+
+    /// True if another connection committed since the previous call (or on
+    /// the first call). A failed pragma read reports a change so the caller
+    /// falls back to the full check.
+    fn changed(&mut self, conn: &Connection) -> bool {
+        match db::data_version(conn) {
+            Ok(version) => {
+                let changed = self.last_data_version != Some(version);
+                self.last_data_version = Some(version);
+                changed
+            }
+            Err(e) => {
+                log::warn!("Failed to read data_version: {}", e);
+                true
+            }
+        }
+    }
+}
+
+fn check_if_changed(
+    app_handle: &AppHandle,
+    conn: &Connection,
+    gate: &mut ChangeGate,
+    source: &str,
+) {
+    if gate.changed(conn) {
+        check_new_notifications(app_handle, conn, source);
+    }
+}
+
 pub fn start(app_handle: AppHandle, db_path: PathBuf) {
     // Initialize last known ID
     if let Ok(conn) = db::open(&db_path) {
@@ -34,12 +89,14 @@ pub fn start(app_handle: AppHandle, db_path: PathBuf) {
     let handle_for_fs = app_handle.clone();
     let db_path_for_fs = db_path.clone();
 
-    // File system watcher (trailing-edge debounce)
+    // File system watcher (short trailing-edge debounce)
     //
-    // Uses recv_timeout to wait 300ms after the last DB file event before checking.
-    // This ensures the check runs AFTER the CLI's transaction has committed,
-    // preventing the watcher from reading uncommitted WAL data and missing
-    // the new notification.
+    // A burst of WAL writes collapses into one check 30ms after the last
+    // event. Whether that check does any work is decided by `ChangeGate`:
+    // `data_version` only moves once a transaction from another connection
+    // has committed, so events for uncommitted WAL frames cost one pragma
+    // read and the commit that follows triggers the real check. This replaces
+    // the old fixed 300ms wait for the CLI's transaction to settle.
     std::thread::spawn(move || {
         let conn = match db::open_reader(&db_path_for_fs) {
             Ok(c) => c,
@@ -65,15 +122,16 @@ pub fn start(app_handle: AppHandle, db_path: PathBuf) {
             .file_name()
             .map(|n| n.to_string_lossy().to_string());
 
-        let debounce = Duration::from_millis(300);
+        let debounce = Duration::from_millis(30);
         let mut last_event: Option<Instant> = None;
+        let mut gate = ChangeGate::new();
 
         loop {
             let timeout = match last_event {
                 Some(t) => {
                     let elapsed = t.elapsed();
                     if elapsed >= debounce {
-                        check_new_notifications(&handle_for_fs, &conn, "file-watcher");
+                        check_if_changed(&handle_for_fs, &conn, &mut gate, "file-watcher");
                         last_event = None;
                         Duration::from_secs(3600)
                     } else {
@@ -114,7 +172,7 @@ pub fn start(app_handle: AppHandle, db_path: PathBuf) {
                 }
                 Err(std::sync::mpsc::RecvTimeoutError::Timeout) => {
                     if last_event.is_some() {
-                        check_new_notifications(&handle_for_fs, &conn, "file-watcher");
+                        check_if_changed(&handle_for_fs, &conn, &mut gate, "file-watcher");
                         last_event = None;
                     }
                 }
@@ -123,7 +181,58 @@ pub fn start(app_handle: AppHandle, db_path: PathBuf) {
         }
     });
 
-    // Polling fallback (every 5 seconds)
+    // CLI wake socket. Hooks send `new <id>` right after committing, so the
+    // check runs without waiting on filesystem event delivery. Optional:
+    // the watcher and poller above still cover a failed bind or a CLI that
+    // predates the socket.
+    let handle_for_wake = app_handle.clone();
+    let db_path_for_wake = db_path.clone();
+    std::thread::spawn(move || {
+        let socket_path = config::wake_socket_path();
+        let sock = match wake::bind(&socket_path) {
+            Ok(s) => s,
+            Err(e) => {
+                log::warn!(
+                    "Failed to bind wake socket {}: {}",
+                    socket_path.display(),
+                    e
+                );
+                return;
+            }
+        };
+        let conn = match db::open_reader(&db_path_for_wake) {
+            Ok(c) => c,
+            Err(e) => {
+                log::error!("Failed to open DB for wake socket: {}", e);
+                return;
+            }
+        };
+
+        let mut buf = [0u8; 64];
+        loop {
+            match sock.recv(&mut buf) {
+                Ok(n) => {
+                    let Some(id) = wake::parse(&buf[..n]) else {
+                        continue;
+                    };
+                    // Already handled by another thread.
+                    if id <= LAST_KNOWN_ID.load(Ordering::SeqCst) {
+                        continue;
+                    }
+                    check_new_notifications(&handle_for_wake, &conn, "wake-socket");
+                }
+                // Transient (EINTR and the like): keep listening, or every
+                // later notification would wait for the polling fallback.
+                Err(e) => {
+                    log::warn!("Wake socket receive error: {}", e);
+                    std::thread::sleep(Duration::from_millis(100));
+                }
+            }
+        }
+    });
+
+    // Polling fallback. Gated on `data_version`, so an idle tick is a single
+    // pragma read and the interval can be much shorter than the old 5s.
     let handle_for_poll = app_handle.clone();
     let db_path_for_poll = db_path.clone();
     std::thread::spawn(move || {
@@ -135,9 +244,10 @@ pub fn start(app_handle: AppHandle, db_path: PathBuf) {
             }
         };
 
+        let mut gate = ChangeGate::new();
         loop {
-            std::thread::sleep(Duration::from_secs(5));
-            check_new_notifications(&handle_for_poll, &conn, "polling");
+            std::thread::sleep(POLL_INTERVAL);
+            check_if_changed(&handle_for_poll, &conn, &mut gate, "polling");
         }
     });
 }
@@ -181,6 +291,8 @@ fn resolve_pane_repo(tmux_pane: &str) -> Option<String> {
 }
 
 fn check_new_notifications(app_handle: &AppHandle, conn: &Connection, source: &str) {
+    let _guard = CHECK_LOCK.lock().unwrap_or_else(|e| e.into_inner());
+
     // External DELETE detection (e.g. `agentoast dismiss` invoked from a tmux
     // hook). The INSERT-based code path below exits early on a DELETE-only
     // change, so rely on a count snapshot and emit here when it shrinks.
@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback, useRef, useMemo } from "react";
+import { useEffect, useState, useCallback, useRef, useMemo, type UIEvent } from "react";
 import { listen } from "@tauri-apps/api/event";
 import { invoke } from "@tauri-apps/api/core";
 import { getVersion } from "@tauri-apps/api/app";
@@ -25,9 +25,20 @@ import type {
   TmuxPaneGroup,
 } from "@/lib/types";
 
+// Distance from the bottom of the list at which the next page is fetched.
+const LOAD_MORE_THRESHOLD_PX = 200;
+
 export function App() {
-  const { notifications, loading, deleteNotification, deleteByPanes, deleteAll, newIds } =
-    useNotifications();
+  const {
+    notifications,
+    loading,
+    hasMore,
+    loadMore,
+    deleteNotification,
+    deleteByPanes,
+    deleteAll,
+    newIds,
+  } = useNotifications();
 
   const { globalMuted, isRepoMuted, toggleGlobalMute, toggleRepoMute } = useMute();
 
@@ -646,6 +657,18 @@ export function App() {
     }
   }, [selectedKey, ephemeralPane, showNonAgentPanes]);
 
+  // Page in older history once the list is scrolled near its end.
+  const handleListScroll = useCallback(
+    (e: UIEvent<HTMLDivElement>) => {
+      if (!hasMore) return;
+      const el = e.currentTarget;
+      if (el.scrollHeight - el.scrollTop - el.clientHeight < LOAD_MORE_THRESHOLD_PX) {
+        void loadMore();
+      }
+    },
+    [hasMore, loadMore],
+  );
+
   // Scroll selected item into view
   useEffect(() => {
     const container = scrollContainerRef.current;
@@ -1146,7 +1169,11 @@ export function App() {
               />
             </div>
           ) : (
-            <div className="h-full overflow-y-auto" ref={scrollContainerRef}>
+            <div
+              className="h-full overflow-y-auto"
+              ref={scrollContainerRef}
+              onScroll={handleListScroll}
+            >
               {loading ? (
                 <div className="flex items-center justify-center h-full">
                   <div className="text-xs text-[var(--text-muted)]">Loading...</div>
@@ -3,20 +3,46 @@ import { invoke } from "@tauri-apps/api/core";
 import { listen } from "@tauri-apps/api/event";
 import type { Notification } from "@/lib/types";
 
+const PAGE_SIZE = 100;
+
+// Newest first, matching the backend's (created_at, id) DESC order.
+function compareNewestFirst(a: Notification, b: Notification): number {
+  if (a.createdAt !== b.createdAt) return a.createdAt < b.createdAt ? 1 : -1;
+  return b.id - a.id;
+}
+
+// Merge rows from a notifications:new event. A new row replaces older rows
+// from the same tmux pane, mirroring the backend's insert behavior.
+function mergeNew(current: Notification[], incoming: Notification[]): Notification[] {
+  if (incoming.length === 0) return current;
+  const ids = new Set(incoming.map((n) => n.id));
+  const panes = new Set(incoming.map((n) => n.tmuxPane).filter((p) => p !== ""));
+  const kept = current.filter((n) => !ids.has(n.id) && !panes.has(n.tmuxPane));
+  return [...incoming, ...kept].sort(compareNewestFirst);
+}
+
 export function useNotifications() {
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [hasMore, setHasMore] = useState(false);
   const [newIds, setNewIds] = useState<Set<number>>(new Set());
   const clearNewTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const loadingMoreRef = useRef(false);
+  const notificationsRef = useRef<Notification[]>([]);
+  notificationsRef.current = notifications;
 
+  // Full reload of the loaded window. Used on startup and after deletes,
+  // which the incremental path below cannot observe.
   const refresh = useCallback(async () => {
     try {
+      const limit = Math.max(PAGE_SIZE, notificationsRef.current.length);
       const [notifs, count] = await Promise.all([
-        invoke<Notification[]>("get_notifications", { limit: 100 }),
+        invoke<Notification[]>("get_notifications", { limit }),
         invoke<number>("get_unread_count"),
       ]);
       setNotifications(notifs);
+      setHasMore(notifs.length === limit);
       setUnreadCount(count);
     } catch (e) {
       console.error("Failed to fetch notifications:", e);
@@ -25,6 +51,30 @@ export function useNotifications() {
     }
   }, []);
 
+  // Append the next page after the oldest loaded row (keyset cursor).
+  // Scroll events fire in bursts, so a request already in flight wins.
+  const loadMore = useCallback(async () => {
+    const last = notificationsRef.current[notificationsRef.current.length - 1];
+    if (!last || loadingMoreRef.current) return;
+    loadingMoreRef.current = true;
+    try {
+      const page = await invoke<Notification[]>("get_notifications", {
+        limit: PAGE_SIZE,
+        beforeCreatedAt: last.createdAt,
+        beforeId: last.id,
+      });
+      setNotifications((prev) => {
+        const ids = new Set(prev.map((n) => n.id));
+        return [...prev, ...page.filter((n) => !ids.has(n.id))];
+      });
+      setHasMore(page.length === PAGE_SIZE);
+    } catch (e) {
+      console.error("Failed to fetch more notifications:", e);
+    } finally {
+      loadingMoreRef.current = false;
+    }
+  }, []);
+
   useEffect(() => {
     void refresh();
 
@@ -39,7 +89,8 @@ export function useNotifications() {
         setNewIds(new Set());
       }, 3000);
 
-      void refresh();
+      // The payload already carries the full rows; no need to re-query them.
+      setNotifications((prev) => mergeNew(prev, event.payload));
     });
 
     const unlisten2 = listen<number>("notifications:unread-count", (event) => {
@@ -85,7 +136,9 @@ export function useNotifications() {
     notifications,
     unreadCount,
     loading,
+    hasMore,
     refresh,
+    loadMore,
     deleteNotification,
     deleteByPanes,
     deleteAll,